@@ -1,8 +1,3 @@
-try:
-    view = traci.gui.getIDList()[0]
-except Exception:
-    view = None
-
 import sys
 # --- FIX WINDOWS UNICODE ERROR ---
 try:
@@ -17,9 +12,7 @@ except:
 # ==========================================================
 
 import os
-import time
-import csv
-import random
+import argparse
 import traceback
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 SUMO_CONFIG = os.path.join(BASE_DIR, "simulation.sumocfg")
@@ -32,27 +25,57 @@ FRAME_PATH = os.path.join(BASE_DIR, "frame.png")
 DASH_PNG = os.path.join(BASE_DIR, "dashboard.png")
 YOLO_MODEL_PATH = os.path.join(BASE_DIR, "yolov8n.pt")
 
-try:
-    import traci
-    from traci import trafficlight
-except:
-    raise RuntimeError("Install SUMO & set SUMO_HOME")
+import launcher
+from backend import traci   # traci / libsumo / recorded trace
+
 
-import pandas as pd
-import matplotlib.pyplot as plt
+from telemetry import TelemetrySink
+from runlog import RunLog, load_run, runlog_path, GROUPS
+from sensing import SubscriptionSensor
+from detector import BatchDetector, DetectionCache
+from frames import GuiFrameSource, CameraSet, approach_cameras
+from policies import Observation, make_policy, POLICIES
+from profiling import StageTimer, ProfileWindow, parse_window
+from live_channel import Publisher
+from shm_ring import StepRing, GROUP_CODES
+from estimator import QueueEstimator
+from steprecord import StepRecord, INDEX, active_mask, encode_order
+from topology import load_topology, net_file_of
+from sumo_outputs import output_args, reduce_outputs, load_kpis, kpis_path
 
 
 # ==========================================================
 # CONFIG
 # ==========================================================
-SUMO_BINARY = "sumo-gui"
 SUMO_CONFIG = "simulation.sumocfg"
 NET_FILE = "network.net.xml"
 ROUTE_FILE = "routes.rou.xml"
 TLS_ID = "center"
 
-SLEEP_BETWEEN_STEPS = 0.004
 YOLO_EVERY_N_STEPS = 10
+SAMPLE_EVERY = 1     # telemetry period in steps; > 1 lets run_policy jump between events
+GAP_OUT = False      # also decide early when the green approach empties after MIN_GREEN
+MIN_GREEN = 12
+YELLOW = 3
+
+PROFILE_STAGES = False   # per-stage timers -> <log>.timings.json
+PROFILE_WINDOW = None    # (start_step, steps) for a cProfile/pyinstrument capture
+PROFILER = "cprofile"    # or "pyinstrument"
+SUMO_OUTPUTS = False     # tripinfo/queue/summary XML -> <log>.kpis.json
+LIVE_TELEMETRY = True    # publish sampled rows on the local live channel (off in experiments.py)
+SHM_RING = None          # name of a shared-memory StepRing to write, e.g. "tsp_steps"
+FUSE_COUNTS = True       # with a detector running, policies see edge counts fused with detections
+
+BASELINE_POLICY = "fixed_time"       # any name in policies.POLICIES
+AI_POLICY = "fairness_density"
+YOLO_MAX_AGE = 2 * YOLO_EVERY_N_STEPS   # steps before a detection is ignored
+YOLO_CAMERAS = "junction"   # "junction": main view only, "approach": one view per approach,
+                            # "roi": main view cropped to each approach (see onnx_detector.py)
+YOLO_MAX_BATCH = 8          # frames per batched inference call
+YOLO_BATCH_TIMEOUT = 0.02   # seconds to wait for a batch to fill
+YOLO_CACHE = True           # reuse counts for frames that look unchanged (detector.DetectionCache)
+YOLO_CACHE_SIZE = 256       # cached frame hashes
+YOLO_CACHE_TTL = 3 * YOLO_EVERY_N_STEPS   # simulation steps a cached count stays usable
 MAX_STEPS = 1200
 
 BASE_CSV = "performance_baseline.csv"
@@ -60,121 +83,169 @@ AI_CSV = "performance_ai.csv"
 DEBUG_CSV = "ai_cycle_debug.csv"
 DASH_PNG = "dashboard.png"
 
+# per-step logs always go to the typed .npz run log; CSV is optional export
+WRITE_CSV = True
+
+AI_COLUMNS = [
+    "Step","North","East","South","West",
+    "SelectedGroup","YOLO_Total","Fused_Total","GreenTime"
+]
+DEBUG_COLUMNS = [
+    "Step", "ActiveGroups", "CycleOrder", "Selected",
+    "Vehicles", "GreenTime"
+]
+
 APPROACH_EDGES = {
     "north": "north_in",
     "east": "east_in",
     "south": "south_in",
     "west": "west_in",
 }
+OUT_EDGES = {
+    "north": "north_out",
+    "east": "east_out",
+    "south": "south_out",
+    "west": "west_out",
+}
+EDGE_TO_GROUP = {e: g for g, e in APPROACH_EDGES.items()}
+IN_EDGE_LIST = [APPROACH_EDGES[g] for g in GROUPS]    # StepRecord index order
+OUT_EDGE_LIST = [OUT_EDGES[g] for g in GROUPS]
 
-GUI_FAST_FILE = "gui_fast.xml"
+# green phase of each group in the 8-phase program; yellow is +1
+GROUP_TO_PHASE = {"north": 0, "east": 2, "south": 4, "west": 6}
 
 
 # ==========================================================
-# GUI FAST MODE
+# SUMO START (gui / headless via launcher --mode)
 # ==========================================================
-def ensure_gui_fast_file():
-    if os.path.exists(GUI_FAST_FILE):
-        return
-    with open(GUI_FAST_FILE, "w") as f:
-        f.write("""
-<viewsettings>
-    <delay value="0"/>
-    <antialiasing value="false"/>
-    <showLaneBorders value="false"/>
-    <showLinkDecals value="false"/>
-    <background value="0,0,0"/>
-</viewsettings>
-""")
-
-import random
-
-def safe_traci_start():
-    ensure_gui_fast_file()
-    random_seed = random.randint(1, 999999)
-
-    traci.start([
-        SUMO_BINARY,
-        "-c", SUMO_CONFIG,
-        "--start",
-        "--quit-on-end",
-        f"--gui-settings-file={GUI_FAST_FILE}",
-        "--seed", str(random_seed)
-    ])
-    
-    print(f"Using SUMO seed: {random_seed}")
-    time.sleep(0.05)
+def safe_traci_start(seed=None, config=SUMO_CONFIG, label=None, outputs=None):
+    # outputs: path prefix for SUMO's tripinfo/queue/summary files
+    extra = output_args(outputs) if outputs else ()
+    return launcher.start(config, seed=seed, extra=extra, label=label)
+
+
+def out_path(name, out_dir=None):
+    # per-run directory (experiment runner) or the shared files in the cwd
+    if not out_dir:
+        return name
+    os.makedirs(out_dir, exist_ok=True)
+    return os.path.join(out_dir, os.path.basename(name))
 
 
 # ==========================================================
 # YOLO
 # ==========================================================
+# The model is loaded on first use (GUI runs only), not at import: a
+# headless or baseline run never pays for importing ultralytics.
 USE_YOLO = True
+YOLO_MODEL = "yolov8n.pt"
 YOLO_CLASSES_VEH = {2, 3, 5, 7}
+YOLO_WORKER = os.environ.get("YOLO_WORKER", "") == "1"   # use a running yolo_worker.py
+YOLO_BACKEND = "torch"      # "torch": ultralytics model, "onnx": exported model on ONNX Runtime
+YOLO_ONNX_MODEL = "yolov8n.onnx"   # or an INT8 export, e.g. yolov8n_int8.onnx
+YOLO_INPUT_SIZE = 320       # inference size for the ONNX backend and "roi" crops
+YOLO_ONNX_EVERY_N_STEPS = 1   # the ONNX backend is cheap enough to detect every step
 _yolo = None
 
-try:
-    from ultralytics import YOLO
-    _yolo = YOLO("yolov8n.pt")
-    print("YOLO Loaded")
-except:
-    USE_YOLO = False
-    print("YOLO disabled")
 
-
-def yolo_total_from_gui(view_id, snap="frame.png"):
-    if not USE_YOLO:
-        return 0
+def load_yolo():
+    """Model (or warm worker client) on first call; None if YOLO is unavailable."""
+    global _yolo, USE_YOLO
+    if _yolo is not None or not USE_YOLO:
+        return _yolo
+    if YOLO_BACKEND == "onnx":
+        try:
+            from onnx_detector import OnnxDetector
+            _yolo = OnnxDetector(YOLO_ONNX_MODEL, YOLO_INPUT_SIZE, classes=sorted(YOLO_CLASSES_VEH))
+            print(f"YOLO Loaded (ONNX Runtime, {YOLO_ONNX_MODEL})")
+        except Exception:
+            USE_YOLO = False
+            print("YOLO disabled")
+        return _yolo
+    if YOLO_WORKER:
+        from yolo_worker import YoloClient
+        _yolo = YoloClient.connect()
+        if _yolo is not None:
+            print("YOLO worker connected")
+            return _yolo
     try:
-        traci.gui.screenshot(view_id, snap)
-        res = _yolo(snap, verbose=False)
-        return sum(1 for box in res[0].boxes if int(box.cls[0]) in YOLO_CLASSES_VEH)
-    except:
-        return 0
+        from ultralytics import YOLO
+        _yolo = YOLO(YOLO_MODEL)
+        print("YOLO Loaded")
+    except Exception:
+        USE_YOLO = False
+        print("YOLO disabled")
+    return _yolo
+
+
+def yolo_count_batch(frames):
+    # one inference call for all frames of a decision tick
+    if hasattr(_yolo, "count_batch"):
+        return _yolo.count_batch(frames)
+    # full frames keep the model's own input size (640); the smaller
+    # YOLO_INPUT_SIZE is for the per-approach crops, a fraction of a frame
+    extra = {"imgsz": YOLO_INPUT_SIZE} if YOLO_CAMERAS == "roi" else {}
+    results = _yolo(list(frames), classes=sorted(YOLO_CLASSES_VEH), verbose=False, **extra)
+    return [
+        sum(1 for box in r.boxes if int(box.cls[0]) in YOLO_CLASSES_VEH)
+        for r in results
+    ]
+
+
+def make_cameras(view, every=YOLO_EVERY_N_STEPS):
+    # the reused frame buffers assume the default cadence; faster than that
+    # a frame can still sit in the detector queue when its buffer comes round
+    copy = every < YOLO_EVERY_N_STEPS
+    if YOLO_CAMERAS == "approach":
+        return approach_cameras(APPROACH_EDGES, copy=copy)
+    if YOLO_CAMERAS == "roi":
+        from onnx_detector import RoiCameraSet
+        topo = load_topology(net_file_of(SUMO_CONFIG))
+        return RoiCameraSet(GuiFrameSource(view), view, topo, APPROACH_EDGES)   # copies its crops
+    return CameraSet({"all": GuiFrameSource(view, copy=copy)})
 
 
 # ==========================================================
 # HELPERS
 # ==========================================================
-def get_counts():
-    q = {}
-    for d, e in APPROACH_EDGES.items():
-        try:
-            q[d] = traci.edge.getLastStepVehicleNumber(e)
-        except:
-            q[d] = 0
-    return q
+def make_sensor():
+    sensor = SubscriptionSensor(edges=list(APPROACH_EDGES.values()) + list(OUT_EDGES.values()))
+    sensor.subscribe()
+    return sensor
+
+
+def check_trace_input(*outputs):
+    """Refuse to replay a trace that this run would overwrite."""
+    if launcher.MODE != "trace" or not launcher.TRACE_FILE:
+        return
+    trace = os.path.abspath(runlog_path(launcher.TRACE_FILE))
+    for path in outputs:
+        if path and os.path.abspath(runlog_path(path)) == trace:
+            raise ValueError(f"--trace {launcher.TRACE_FILE} is also an output of this run "
+                             f"({path}); copy it elsewhere to replay it")
+
+
+def read_step(rec, sensor):
+    # reads the subscription cache filled by sensor.update() into the record
+    rec.read_sensor(sensor, IN_EDGE_LIST, OUT_EDGE_LIST)
 
 
 # ==========================================================
 # 8-PHASE TRAFFIC LOGIC
 # ==========================================================
-def install_8_phase_tls(tls):
+def install_8_phase_tls(tls, config=SUMO_CONFIG):
     try:
-        lanes = traci.trafficlight.getControlledLanes(tls)
-        if not lanes:
+        # link layout and approach directions come from the network file
+        info = load_topology(net_file_of(config)).tls.get(tls)
+        if info is None:
+            print(f"[WARN] {tls} controls no links in the network file")
             return
 
-        def approach(l):
-            return l.split("_")[0]
-
         phases = []
-        dirs = ["north", "east", "south", "west"]
-
-        def make_state(g, col):
-            s = ""
-            for ln in lanes:
-                if approach(ln) == g:
-                    s += col
-                else:
-                    s += "r"
-            return s
-
-        for g in dirs:
-            phases.append(trafficlight.Phase(15, make_state(g, "G")))
-            phases.append(trafficlight.Phase(3, make_state(g, "y")))
-
-        logic = trafficlight.Logic("8phase", 0, 0, phases)
+        for i, state in enumerate(info.group_states(GROUPS)):
+            phases.append(traci.trafficlight.Phase(15 if i % 2 == 0 else YELLOW, state))
+
+        logic = traci.trafficlight.Logic("8phase", 0, 0, phases)
         traci.trafficlight.setProgramLogic(tls, logic)
 
     except:
@@ -182,163 +253,269 @@ def install_8_phase_tls(tls):
 
 
 # ==========================================================
-# BASELINE (unchanged)
+# SHARED CONTROL LOOP (any policy from policies.py)
+# Event-driven: the policy is asked only at the end of a green (or on
+# gap-out), yellow is handled here, and between events the simulation is
+# advanced in bulk. Every policy gets the same sensing, yellow handling
+# and telemetry, so runs are directly comparable.
 # ==========================================================
-def baseline_run(max_steps=MAX_STEPS):
-    print("\nRunning Baseline...")
-
-    with open(BASE_CSV, "w", newline="") as f:
-        csv.writer(f).writerow(["Step", "North", "East", "South", "West", "GreenTime"])
-
-    safe_traci_start()
-    install_8_phase_tls(TLS_ID)
-
+def run_policy(policy, log_csv=AI_CSV, max_steps=MAX_STEPS, seed=None, out_dir=None,
+               config=SUMO_CONFIG, label=None, sample_every=None, debug_csv=None,
+               use_yolo=True, profile=None, profile_window=None, profiler=None,
+               sumo_outputs=None, live=None, shm=None, fuse=None):
+    print(f"\nRunning {policy.name}...")
+    sample_every = max(1, sample_every or SAMPLE_EVERY)
+    timer = StageTimer(PROFILE_STAGES if profile is None else profile)
+    window = profile_window or PROFILE_WINDOW
+
+    log_path = out_path(log_csv, out_dir)
+    debug_path = out_path(debug_csv, out_dir) if debug_csv else None
+    check_trace_input(log_path, debug_path)
+
+    # start first: in trace mode this loads the recorded log, and the
+    # sinks below truncate their files when they open
+    outputs = SUMO_OUTPUTS if sumo_outputs is None else sumo_outputs
+    safe_traci_start(seed, config, label, outputs=log_path if outputs else None)
+
+    use_live = LIVE_TELEMETRY if live is None else live
+    # everything opened below is closed in the finally, also when setup fails
+    run_log = csv_log = debug_log = live = ring = None
+    own_ring = False
+    detector = cache = cams = prof = None
+    run_name = label or policy.name
     step = 0
-    phase = 0
-    next_change = 0
-
-    while step < max_steps and traci.simulation.getMinExpectedNumber() > 0:
-        traci.simulationStep()
-
-        if step >= next_change:
-            traci.trafficlight.setPhase(TLS_ID, phase)
-            dur = 15 if phase % 2 == 0 else 3
-            traci.trafficlight.setPhaseDuration(TLS_ID, dur)
-            next_change = step + dur
-            phase = (phase + 1) % 8
+    try:
+        # main log (+ optional CSV)
+        run_log = RunLog(log_path, AI_COLUMNS, categories={"SelectedGroup": GROUPS})
+        csv_log = TelemetrySink(log_path, AI_COLUMNS) if WRITE_CSV else None
+
+        # debug CSV (one row per decision)
+        debug_log = TelemetrySink(debug_path, DEBUG_COLUMNS) if debug_path else None
+        live = use_live and Publisher()
+        # shm: ring name, or a StepRing the caller keeps open across runs
+        shm = shm or SHM_RING
+        own_ring = isinstance(shm, str)
+        ring = StepRing.create(shm) if own_ring else shm
+
+        install_8_phase_tls(TLS_ID, config)
+        sensor = make_sensor()
+        policy.reset()
+
+        view = launcher.gui_view() if use_yolo else None   # None when headless
+        yolo_every = YOLO_ONNX_EVERY_N_STEPS if YOLO_BACKEND == "onnx" else YOLO_EVERY_N_STEPS
+        if view is not None and load_yolo() is not None:
+            cache = DetectionCache(yolo_count_batch, YOLO_CACHE_SIZE, YOLO_CACHE_TTL) if YOLO_CACHE else None
+            detector = BatchDetector(cache or yolo_count_batch, YOLO_MAX_BATCH, YOLO_BATCH_TIMEOUT)
+            cams = make_cameras(view, yolo_every)
+
+        # one record and one observation per run, overwritten in place each step
+        rec = StepRecord()
+        # fusing only helps when there are detections; otherwise use the exact counts
+        fuse = FUSE_COUNTS if fuse is None else fuse
+        estimator = QueueEstimator(GROUPS) if fuse and detector else None
+        seen = rec.estimate if estimator else rec.counts      # what the policy decides on
+        obs = Observation(counts=rec.estimate_view if estimator else rec.count_view,
+                          queues=rec.halting_view, out_counts=rec.out_view)
+        yolo_q = obs.yolo
+        cur = None          # group holding the signal (green, or yellow while ending)
+        pending = None      # (group, green) to start once the yellow ends
+        phase_end = 0
+        green_start = 0
+        green = 0
+        yolo_pending = False
+        yolo_max_age = max(YOLO_MAX_AGE, 2 * yolo_every)
+        prof = ProfileWindow(*window, out=log_path,
+                             profiler=profiler or PROFILER) if window else None
+
+        while step < max_steps and sensor.min_expected > 0:
+            if prof:
+                prof.update(step)
+
+            t = timer.tic()
+            sensor.step()
+            t = timer.lap("sim_step", t)
+            if yolo_pending:
+                for ready in cams.after_step():
+                    detector.submit(*ready)
+                yolo_pending = False
+            rec.step = step
+            read_step(rec, sensor)
+            q = rec.count_view
+            t = timer.lap("sensing", t)
+
+            # YOLO occasionally, off-thread; use the latest result unless stale
+            if cams and step % yolo_every == 0:
+                cams.request(step)
+                yolo_pending = True
+            # edge counts first: detections are fused as an offset on top of them
+            if estimator:
+                estimator.update_counts(step, q)
+            # per-camera counts (per approach with YOLO_CAMERAS="approach" or "roi")
+            if detector:
+                yolo = 0
+                for key in cams.keys():
+                    det = detector.latest(key, step, yolo_max_age)
+                    c = yolo_q[key] = det.count if det else 0
+                    yolo += c
+                    if key in INDEX:
+                        rec.yolo[INDEX[key]] = c
+                    if det and estimator:
+                        estimator.update_detection(key, det.step, det.count, step)
+                rec.yolo_total = yolo
+            if estimator:
+                estimator.fill(rec.estimate)
+            t = timer.lap("yolo", t)
+
+            gap_out = (
+                GAP_OUT and pending is None and cur is not None
+                and step - green_start >= MIN_GREEN and q[cur] == 0 and rec.active
+            )
+
+            if pending is not None and step >= phase_end:
+                # yellow over: start the decided green
+                cur, green = pending
+                pending = None
+                traci.trafficlight.setPhase(TLS_ID, GROUP_TO_PHASE[cur])
+                traci.trafficlight.setPhaseDuration(TLS_ID, green)
+                phase_end = step + green
+                green_start = step
+
+            elif step >= phase_end or gap_out:
+                obs.step = step
+                obs.current = cur
+                obs.elapsed = step - green_start
+                selected, dur = policy.decide(obs)
+
+                if selected is not None:
+                    if selected == cur:
+                        # extend the running green
+                        traci.trafficlight.setPhaseDuration(TLS_ID, dur)
+                        phase_end = step + dur
+                        green = dur
+                    elif cur is None:
+                        cur, green = selected, dur
+                        traci.trafficlight.setPhase(TLS_ID, GROUP_TO_PHASE[cur])
+                        traci.trafficlight.setPhaseDuration(TLS_ID, green)
+                        phase_end = step + green
+                        green_start = step
+                    else:
+                        traci.trafficlight.setPhase(TLS_ID, GROUP_TO_PHASE[cur] + 1)
+                        traci.trafficlight.setPhaseDuration(TLS_ID, YELLOW)
+                        pending = (selected, dur)
+                        phase_end = step + YELLOW
+
+                    if debug_log:
+                        cycle_list = getattr(policy, "cycle_list", [])
+                        # active groups as a bitmask, cycle order as initials ("WES")
+                        debug_log.write((
+                            step, active_mask(seen), encode_order(cycle_list),
+                            selected, seen[INDEX[selected]], dur
+                        ))
+            t = timer.lap("decision", t)
+
+            # save main log (sampled)
+            if step % sample_every == 0:
+                rec.fused = round(estimator.total()) if estimator else max(sum(rec.counts), rec.yolo_total)
+                rec.selected = GROUP_CODES.get(cur, -1)
+                rec.green = green
+                row = rec.fill_row()
+                run_log.append_coded(row)
+                if csv_log or live:
+                    # exports carry the group name, not its code
+                    labelled = (*row[:5], cur, *row[6:])
+                    if csv_log:
+                        csv_log.write(labelled)
+                    if live:
+                        live.publish(dict(zip(AI_COLUMNS, labelled), run=run_name))
+                if ring:
+                    ring.write(rec.ring_row())
+            t = timer.lap("telemetry", t)
+
+            # advance in bulk to the next thing that needs the loop:
+            # phase end, telemetry sample, YOLO frame request/pick-up
+            nxt = min(max_steps, step + sample_every - step % sample_every, max(phase_end, step + 1))
+            if GAP_OUT and pending is None:
+                nxt = min(nxt, max(green_start + MIN_GREEN, step + 1))
+            if cams:
+                nxt = min(nxt, step + 1 if yolo_pending
+                          else step + yolo_every - step % yolo_every)
+            skip = nxt - step - 1
+            if skip > 0:
+                sensor.advance(skip)
+                step += skip
+                timer.lap("advance", t)
+            timer.end_step()
 
-        q = get_counts()
-        with open(BASE_CSV, "a", newline="") as f:
-            csv.writer(f).writerow([step, q["north"], q["east"], q["south"], q["west"], 15])
+            step += 1
+    finally:
+        if prof:
+            prof.finish()
+        timer.save(log_path)
+        timer.print_table()
+        if csv_log:
+            csv_log.close()
+        if run_log is not None:     # an empty RunLog is falsy
+            run_log.close()
+        if debug_log:
+            debug_log.close()
+        if detector:
+            detector.close()
+        if cams:
+            cams.close()
+        if cache:
+            st = cache.stats()
+            print(f"Detection cache: {st['hits']} hits / {st['misses']} misses "
+                  f"({100 * st['hit_rate']:.1f} %), {st['expired']} expired, {st['evicted']} evicted")
+        if live:
+            live.publish({"run": run_name, "Step": step, "done": True})
+            live.close()
+        if ring and own_ring:
+            ring.close()
+        traci.close()
+
+    # bulk stepping misses arrivals in skipped steps: report no number
+    # rather than a low one, unless tripinfo has the exact count
+    throughput = sensor.arrived if sensor.exact_flow else float("nan")
+    result = {"steps": step}
+    if outputs:
+        # files are complete once SUMO has closed
+        result["kpis"] = reduce_outputs(log_path, EDGE_TO_GROUP)
+        trips = (result["kpis"] or {}).get("approaches", {}).get("all", {})
+        throughput = trips.get("throughput", throughput)
+    result["throughput"] = throughput
+    if throughput == throughput:
+        print(f"{policy.name} complete (throughput: {throughput} vehicles arrived)")
+    else:
+        print(f"{policy.name} complete (throughput: n/a with --sample-every > 1; use --sumo-outputs)")
+    return result
 
-        step += 1
 
-    traci.close()
+# ==========================================================
+# BASELINE (fixed time)
+# ==========================================================
+def baseline_run(max_steps=MAX_STEPS, seed=None, out_dir=None, config=SUMO_CONFIG, label=None,
+                 policy=BASELINE_POLICY, sample_every=None, **kwargs):
+    print("\nRunning Baseline...")
+    return run_policy(make_policy(policy), BASE_CSV, max_steps, seed, out_dir, config, label,
+                      sample_every=sample_every, use_yolo=False, **kwargs)
 
 
 # ==========================================================
 # ADAPTIVE AI WITH FAIRNESS + DENSITY
 # (compact debug → CSV only, no prints)
 # ==========================================================
-def adaptive_run(max_steps=MAX_STEPS):
+def adaptive_run(max_steps=MAX_STEPS, seed=None, out_dir=None, config=SUMO_CONFIG, label=None,
+                 policy=AI_POLICY, sample_every=None, **kwargs):
     print("\nRunning ADAPTIVE AI...")
-
-    # main AI CSV
-    with open(AI_CSV, "w", newline="") as f:
-        csv.writer(f).writerow([
-            "Step","North","East","South","West",
-            "SelectedGroup","YOLO_Total","Fused_Total","GreenTime"
-        ])
-
-    # debug CSV
-    with open(DEBUG_CSV, "w", newline="") as f:
-        csv.writer(f).writerow([
-            "Step", "ActiveGroups", "CycleOrder", "Selected",
-            "Vehicles", "GreenTime"
-        ])
-
-    safe_traci_start()
-    install_8_phase_tls(TLS_ID)
-
-    step = 0
-    view = traci.gui.getIDList()[0]
-
-    groups = ["north","east","south","west"]
-
-    cycle_list = []
-    cycle_index = 0
-    rotation_count = 0
-
-    group_to_phase = {"north":0,"east":2,"south":4,"west":6}
-    cur_group = "north"
-    next_switch = 0
-
-    MIN_G, MAX_G = 12, 45
-    YEL = 3
-
-    while step < max_steps and traci.simulation.getMinExpectedNumber() > 0:
-
-        traci.simulationStep()
-        q = get_counts()
-
-        # active lanes only
-        active = [g for g in groups if q[g] > 0]
-
-        if len(active) == 0:
-            step += 1
-            continue
-
-        # fairness cycle
-        if rotation_count < len(active):
-
-            if not cycle_list:
-                cycle_list = sorted(active, key=lambda g: q[g], reverse=True)
-                cycle_index = 0
-
-            selected = cycle_list[cycle_index % len(cycle_list)]
-            cycle_index += 1
-            rotation_count += 1
-
-        else:
-            selected = max(active, key=lambda g: q[g])
-            rotation_count = 0
-            cycle_index = 0
-            cycle_list = []
-
-        # green time calculation
-        base_time = q[selected] * 5.0
-        fairness = min(q.values()) * 2
-        green = int(max(MIN_G, min(MAX_G, base_time + fairness)))
-
-        # YOLO occasionally
-        if USE_YOLO and step % YOLO_EVERY_N_STEPS == 0:
-            yolo = yolo_total_from_gui(view)
-        else:
-            yolo = 0
-
-        fused = max(sum(q.values()), yolo)
-
-        # signal switching
-        if step >= next_switch:
-
-            if step > 0:
-                # yellow
-                y_phase = group_to_phase[cur_group] + 1
-                traci.trafficlight.setPhase(TLS_ID, y_phase)
-                traci.trafficlight.setPhaseDuration(TLS_ID, YEL)
-                traci.simulationStep()
-
-            # green
-            cur_group = selected
-            traci.trafficlight.setPhase(TLS_ID, group_to_phase[cur_group])
-            traci.trafficlight.setPhaseDuration(TLS_ID, green)
-            next_switch = step + green
-
-        # save main CSV
-        with open(AI_CSV, "a", newline="") as f:
-            csv.writer(f).writerow([
-                step, q["north"], q["east"], q["south"], q["west"],
-                selected, yolo, fused, green
-            ])
-
-        # save debug CSV
-        with open(DEBUG_CSV, "a", newline="") as f:
-            csv.writer(f).writerow([
-                step, active, cycle_list if cycle_list else "[]",
-                selected, q[selected], green
-            ])
-
-        step += 1
-
-    traci.close()
-    print("AI Complete")
+    return run_policy(make_policy(policy), AI_CSV, max_steps, seed, out_dir, config, label,
+                      sample_every=sample_every, debug_csv=DEBUG_CSV, **kwargs)
 
 
 # ==========================================================
 # SUMMARY + DASHBOARD
 # ==========================================================
 def summarize(csv_file, label):
-    df = pd.read_csv(csv_file)
+    df = load_run(csv_file)
     lanes = ["North","East","South","West"]
     df["Total"] = df[lanes].sum(axis=1)
     print(f"\nSummary {label}:", df["Total"].sum())
@@ -346,8 +523,10 @@ def summarize(csv_file, label):
 
 
 def make_and_save_dashboard():
-    df_b = pd.read_csv(BASE_CSV)
-    df_a = pd.read_csv(AI_CSV)
+    import matplotlib.pyplot as plt
+
+    df_b = load_run(BASE_CSV)
+    df_a = load_run(AI_CSV)
 
     avg_b = df_b[["North","East","South","West"]].mean()
     avg_a = df_a[["North","East","South","West"]].mean()
@@ -369,8 +548,8 @@ def make_and_save_dashboard():
     plt.savefig(DASH_PNG)
     plt.close()
 def print_cmd_dashboard():
-    df_b = pd.read_csv(BASE_CSV)
-    df_a = pd.read_csv(AI_CSV)
+    df_b = load_run(BASE_CSV)
+    df_a = load_run(AI_CSV)
 
     avg_b = df_b[["North","East","South","West"]].mean().round(2)
     avg_a = df_a[["North","East","South","West"]].mean().round(2)
@@ -393,7 +572,7 @@ def print_cmd_dashboard():
     print("--------------------------------------------\n")
 
     print("BASELINE PERFORMANCE")
-    print(f"• Total Vehicles: {total_b}")
+    print(f"• Vehicle-steps (summed counts): {total_b}")
     print("• Avg Queue:")
     print(f"- North: {avg_b['North']}")
     print(f"- East : {avg_b['East']}")
@@ -402,7 +581,7 @@ def print_cmd_dashboard():
     print(f"• Avg Green Time: {green_b} sec\n")
 
     print("ADAPTIVE AI PERFORMANCE")
-    print(f"• Total Vehicles: {total_a}")
+    print(f"• Vehicle-steps (summed counts): {total_a}")
     print("• Avg Queue:")
     print(f"- North: {avg_a['North']}")
     print(f"- East : {avg_a['East']}")
@@ -414,27 +593,99 @@ def print_cmd_dashboard():
     print(f"      AI QUEUE REDUCTION: {improvement} %")
     print("--------------------------------------------\n")
 
+    print_trip_kpis()
+
+
+def fresh_kpis(log_csv):
+    # ignore KPIs left over from an earlier run that had --sumo-outputs
+    k = load_kpis(log_csv)
+    npz = runlog_path(log_csv)
+    if k and os.path.exists(npz) and os.path.getmtime(kpis_path(log_csv)) < os.path.getmtime(npz):
+        return None
+    return k
+
+
+def print_trip_kpis():
+    """Delay/waiting/stops/throughput from SUMO's output files, if written."""
+    k_b = fresh_kpis(BASE_CSV)
+    k_a = fresh_kpis(AI_CSV)
+    if not k_b or not k_a:
+        return
+
+    print("TRIP KPIs (SUMO tripinfo)         Baseline        AI")
+    fields = [("mean_delay_s", "delay s"), ("mean_waiting_s", "waiting s"),
+              ("mean_stops", "stops"), ("throughput", "throughput")]
+    for appr in GROUPS + ["all"]:
+        b = k_b["approaches"].get(appr, {})
+        a = k_a["approaches"].get(appr, {})
+        if not b and not a:
+            continue
+        for key, name in fields:
+            print(f"- {appr:<6} {name:<12} {str(b.get(key, '-')):>16} {str(a.get(key, '-')):>9}")
+
+    d_b = k_b["approaches"].get("all", {}).get("mean_delay_s")
+    d_a = k_a["approaches"].get("all", {}).get("mean_delay_s")
+    if d_b and d_a is not None:
+        print("--------------------------------------------")
+        print(f"      AI DELAY REDUCTION: {round((d_b - d_a) / d_b * 100, 2)} %")
+        print("--------------------------------------------\n")
+
 
 
 # ==========================================================
 # MAIN
 # ==========================================================
 def main():
-    # ---- Run Baseline Simulation ----
-    baseline_run()
-
-    #  FIX 1: Force baseline CSV to fully write before dashboard reads it
-    baseline_df = pd.read_csv(BASE_CSV)
-    baseline_df.to_csv(BASE_CSV, index=False)
+    global YOLO_WORKER, YOLO_BACKEND, YOLO_CAMERAS
+    parser = argparse.ArgumentParser(description="Baseline vs adaptive AI comparison")
+    parser.add_argument("--sample-every", type=int, default=SAMPLE_EVERY,
+                        help="telemetry period in steps (>1 = bulk stepping)")
+    parser.add_argument("--baseline-policy", choices=sorted(POLICIES), default=BASELINE_POLICY)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default=AI_POLICY,
+                        help="policy for the AI run")
+    parser.add_argument("--profile-stages", action="store_true",
+                        help="time each loop stage, write <log>.timings.json")
+    parser.add_argument("--profile-window", type=parse_window, default=None, metavar="START:STEPS",
+                        help="cProfile/pyinstrument capture of a window of steps")
+    parser.add_argument("--profiler", choices=["cprofile", "pyinstrument"], default=PROFILER)
+    parser.add_argument("--sumo-outputs", action="store_true", default=SUMO_OUTPUTS,
+                        help="write tripinfo/queue/summary XML and reduce them to <log>.kpis.json")
+    parser.add_argument("--no-live", action="store_true", help="do not publish on the live channel")
+    parser.add_argument("--yolo-worker", action="store_true",
+                        help="count vehicles with a running yolo_worker.py instead of loading the model")
+    parser.add_argument("--yolo-backend", choices=["torch", "onnx"], default=YOLO_BACKEND,
+                        help="onnx: exported (optionally INT8) model on ONNX Runtime, CPU friendly")
+    parser.add_argument("--cameras", choices=["junction", "approach", "roi"], default=YOLO_CAMERAS,
+                        help="roi: one count per approach from crops of the main view")
+    parser.add_argument("--no-fuse", action="store_true",
+                        help="policies see raw edge counts instead of the fused estimate")
+    parser.add_argument("--shm", default=SHM_RING, metavar="NAME",
+                        help="also write each sampled step to a shared-memory ring (see shm_ring.py)")
+    args = launcher.parse_args(parser=parser)
+    try:
+        check_trace_input(out_path(BASE_CSV), out_path(AI_CSV), out_path(DEBUG_CSV))
+    except ValueError as e:
+        parser.error(str(e))
+
+    YOLO_WORKER = YOLO_WORKER or args.yolo_worker
+    YOLO_BACKEND, YOLO_CAMERAS = args.yolo_backend, args.cameras
+    # one ring for both runs, so attached readers keep their stream
+    ring = StepRing.create(args.shm) if args.shm else None
+    opts = dict(profile=args.profile_stages, profile_window=args.profile_window, profiler=args.profiler,
+                sumo_outputs=args.sumo_outputs, live=not args.no_live,
+                shm=ring, fuse=not args.no_fuse)
 
-    # ---- Run Adaptive AI Simulation ----
-    adaptive_run()
+    try:
+        # ---- Run Baseline Simulation ----
+        baseline_run(seed=args.seed, policy=args.baseline_policy, sample_every=args.sample_every, **opts)
 
-    #  FIX 2: Force AI CSV to fully write before dashboard reads it
-    ai_df = pd.read_csv(AI_CSV)
-    ai_df.to_csv(AI_CSV, index=False)
+        # ---- Run Adaptive AI Simulation ----
+        adaptive_run(seed=args.seed, policy=args.policy, sample_every=args.sample_every, **opts)
+    finally:
+        if ring:
+            ring.close()
 
-    # ---- Now print & plot with fresh CSV data ----
+    # ---- Now print & plot (sinks are flushed and closed by now) ----
     print_cmd_dashboard()
     make_and_save_dashboard()
 
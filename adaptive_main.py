@@ -1,9 +1,8 @@
 # adaptive_main.py — FINAL VERSION (with YOLO + SUMO fusion)
 import sys
 import os
-import time
-import traci
-import pandas as pd
+import launcher
+from backend import traci
 import traceback
 
 # ----- Windows UTF-8 fix -----
@@ -43,27 +42,27 @@ YOLO_CLASSES = {2, 3, 5, 7}   # car, bus, truck, motorcycle
 YOLO_EVERY_N_STEPS = 10
 
 _yolo = None
-try:
-    from ultralytics import YOLO
-    _yolo = YOLO(YOLO_MODEL_PATH)
-    print("YOLO successfully loaded:", YOLO_MODEL_PATH)
-except Exception as e:
-    USE_YOLO = False
-    print("YOLO disabled (not found or failed to load):", e)
+
+
+def get_yolo():
+    """Load the model on first use; None when YOLO is unavailable."""
+    global _yolo, USE_YOLO
+    if _yolo is not None or not USE_YOLO:
+        return _yolo
+    try:
+        from ultralytics import YOLO
+        _yolo = YOLO(YOLO_MODEL_PATH)
+        print("YOLO successfully loaded:", YOLO_MODEL_PATH)
+    except Exception as e:
+        USE_YOLO = False
+        print("YOLO disabled (not found or failed to load):", e)
+    return _yolo
 
 # ================================================================
 # SAFE SUMO START
 # ================================================================
-def safe_start():
-    import random
-    seed = random.randint(1, 999999)
-    traci.start([
-        "sumo-gui",
-        "-c", SUMO_CONFIG,
-        "--start",
-        "--quit-on-end",
-        "--seed", str(seed)
-    ])
+def safe_start(seed=None):
+    seed = launcher.start(SUMO_CONFIG, seed=seed)
     print("SUMO started with seed:", seed)
-    # small pause so GUI initi
+    return seed
 
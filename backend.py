@@ -0,0 +1,297 @@
+# backend.py
+# Simulation backend used by the controllers.
+#
+#   traci    TraCI socket client (default)
+#   libsumo  SUMO loaded in-process, no IPC; falls back to traci if missing
+#   trace    replays a recorded per-step run log, no SUMO needed
+#
+# Controllers do `from backend import traci` and call it exactly like the
+# traci module. `traci` here is a thin proxy that forwards to whichever
+# backend is active, so switching backends needs no other code changes.
+
+import numpy as np
+
+try:
+    import traci as _traci
+    from traci import constants
+except ImportError:
+    _traci = None
+
+    class constants:
+        # the few TraCI variable ids the sensing layer subscribes to
+        LAST_STEP_VEHICLE_NUMBER = 0x10
+        LAST_STEP_VEHICLE_HALTING_NUMBER = 0x14
+        VAR_DEPARTED_VEHICLES_IDS = 0x74
+        VAR_ARRIVED_VEHICLES_IDS = 0x7a
+        VAR_MIN_EXPECTED_VEHICLES = 0x7d
+        VAR_TIME = 0x66
+
+
+BACKENDS = ("traci", "libsumo", "trace")
+NAME = "traci"
+
+
+class _BackendProxy:
+    def __init__(self, impl):
+        self._impl = impl
+
+    def __getattr__(self, name):
+        impl = self.__dict__["_impl"]
+        if impl is None:
+            raise RuntimeError("Install SUMO & set SUMO_HOME")
+        return getattr(impl, name)
+
+
+traci = _BackendProxy(_traci)
+
+
+def use(name, **kwargs):
+    """Switch the active backend; returns the backend object.
+
+    kwargs are passed to TraceBackend for name="trace".
+    """
+    global NAME
+    if name not in BACKENDS:
+        raise ValueError(f"unknown backend {name!r}, expected one of {BACKENDS}")
+
+    if name == "libsumo":
+        try:
+            import libsumo
+            impl = libsumo
+        except ImportError:
+            print("libsumo not available, falling back to traci")
+            name, impl = "traci", _traci
+    elif name == "trace":
+        impl = TraceBackend(**kwargs)
+    else:
+        impl = _traci
+
+    if impl is None:
+        raise RuntimeError("Install SUMO & set SUMO_HOME")
+    traci._impl = impl
+    NAME = name
+    return impl
+
+
+# ==========================================================
+# RECORDED-TRACE BACKEND
+# ==========================================================
+# Replays the per-step approach counts of any run log written by the
+# simulation loops (performance_*.npz / .csv). The replay is open-loop:
+# signal commands are accepted and recorded in `actions`, but they do not
+# change the counts. That is enough to exercise a controller's sensing,
+# decision and switching code on a machine without SUMO.
+
+DEFAULT_EDGE_COLUMNS = {
+    "north_in": "North",
+    "east_in": "East",
+    "south_in": "South",
+    "west_in": "West",
+}
+
+
+class Phase:
+    def __init__(self, duration, state, minDur=-1, maxDur=-1, next=(), name=""):
+        self.duration = duration
+        self.state = state
+        self.minDur = minDur
+        self.maxDur = maxDur
+        self.next = next
+        self.name = name
+
+
+class Logic:
+    def __init__(self, programID, type, currentPhaseIndex, phases=None, subParameter=None):
+        self.programID = programID
+        self.type = type
+        self.currentPhaseIndex = currentPhaseIndex
+        self.phases = phases or []
+        self.subParameter = subParameter or {}
+
+
+class _TraceDomain:
+    def __init__(self, trace):
+        self._t = trace
+        self._subs = []
+
+    def subscribe(self, obj_id, var_ids=(), begin=None, end=None, parameters=None):
+        if obj_id not in self._subs:
+            self._subs.append(obj_id)
+
+    def getLastStepVehicleNumber(self, obj_id):
+        return self._value(obj_id)
+
+    def getLastStepHaltingNumber(self, obj_id):
+        # a replayed count is treated as fully queued
+        return self._value(obj_id)
+
+    def getAllSubscriptionResults(self):
+        num = constants.LAST_STEP_VEHICLE_NUMBER
+        halt = constants.LAST_STEP_VEHICLE_HALTING_NUMBER
+        out = {}
+        for o in self._subs:
+            v = self._value(o)
+            out[o] = {num: v, halt: v}
+        return out
+
+
+class _TraceEdge(_TraceDomain):
+    def getIDList(self):
+        return list(self._t.edges)
+
+    def _value(self, edge_id):
+        return self._t.edge_count(edge_id)
+
+
+class _TraceLane(_TraceDomain):
+    def getIDList(self):
+        return list(self._t.lanes)
+
+    def _value(self, lane_id):
+        # the whole edge count is attributed to the edge's lane 0
+        edge_id, _, index = lane_id.rpartition("_")
+        return self._t.edge_count(edge_id) if index == "0" else 0
+
+
+class _TraceSimulation:
+    def __init__(self, trace):
+        self._t = trace
+
+    def getTime(self):
+        return float(self._t.index + 1)
+
+    def getDeltaT(self):
+        return 1.0
+
+    def getMinExpectedNumber(self):
+        return 1 if self._t.index + 1 < self._t.n_steps else 0
+
+    def subscribe(self, var_ids=(), begin=None, end=None, parameters=None):
+        pass
+
+    def getSubscriptionResults(self, obj_id=None):
+        i = self._t.index
+        return {
+            constants.VAR_DEPARTED_VEHICLES_IDS: self._t.ids("departed", i),
+            constants.VAR_ARRIVED_VEHICLES_IDS: self._t.ids("arrived", i),
+            constants.VAR_MIN_EXPECTED_VEHICLES: self.getMinExpectedNumber(),
+            constants.VAR_TIME: self.getTime(),
+        }
+
+
+class _TraceTrafficLight:
+    Phase = Phase
+    Logic = Logic
+
+    def __init__(self, trace):
+        self._t = trace
+        self.phase = 0
+        self.duration = 0
+        self.logic = None
+
+    def getIDList(self):
+        return [self._t.tls_id]
+
+    def getControlledLanes(self, tls_id):
+        return list(self._t.lanes)
+
+    def getControlledLinks(self, tls_id):
+        return [[(ln, "", "")] for ln in self._t.lanes]
+
+    def setProgramLogic(self, tls_id, logic):
+        self.logic = logic
+
+    def getCompleteRedYellowGreenDefinition(self, tls_id):
+        if self.logic is None:
+            self.logic = self._t.default_logic()
+        return [self.logic]
+
+    def setPhase(self, tls_id, index):
+        self.phase = index
+        self._t.actions.append((self._t.index, "phase", index))
+
+    def setPhaseDuration(self, tls_id, duration):
+        self.duration = duration
+        self._t.actions.append((self._t.index, "duration", duration))
+
+    def getPhase(self, tls_id):
+        return self.phase
+
+    def getRedYellowGreenState(self, tls_id):
+        phases = self.getCompleteRedYellowGreenDefinition(tls_id)[0].phases
+        return phases[self.phase % len(phases)].state if phases else ""
+
+
+class _TraceGui:
+    def getIDList(self):
+        return []
+
+    def screenshot(self, view_id, filename, width=-1, height=-1):
+        pass
+
+
+class TraceBackend:
+    """Stand-in for traci that replays a recorded run log."""
+
+    def __init__(self, path, edge_columns=None, lanes_per_edge=2, tls_id="center"):
+        from runlog import load_run
+
+        df = load_run(path)
+        edge_columns = edge_columns or DEFAULT_EDGE_COLUMNS
+        self.edges = list(edge_columns)
+        self.lanes = [f"{e}_{i}" for e in self.edges for i in range(lanes_per_edge)]
+        self.tls_id = tls_id
+        self.counts = df[list(edge_columns.values())].to_numpy(dtype=np.int32)
+        self.n_steps = len(self.counts)
+        self._edge_idx = {e: i for i, e in enumerate(self.edges)}
+        # optional per-step vehicle flow columns
+        self._flows = {
+            k: df[c].to_numpy(dtype=np.int32)
+            for k, c in (("departed", "Departed"), ("arrived", "Arrived"))
+            if c in df.columns
+        }
+        self.index = -1
+        self.actions = []
+
+        self.simulation = _TraceSimulation(self)
+        self.edge = _TraceEdge(self)
+        self.lane = _TraceLane(self)
+        self.trafficlight = _TraceTrafficLight(self)
+        self.gui = _TraceGui()
+
+    def edge_count(self, edge_id):
+        i = self._edge_idx.get(edge_id)
+        if i is None or self.index < 0:
+            return 0
+        return int(self.counts[min(self.index, self.n_steps - 1), i])
+
+    def ids(self, kind, i):
+        flow = self._flows.get(kind)
+        if flow is None or not 0 <= i < self.n_steps:
+            return ()
+        return tuple(f"{kind}{i}.{k}" for k in range(flow[i]))
+
+    def default_logic(self):
+        # one green + yellow pair per approach edge
+        per_edge = len(self.lanes) // max(1, len(self.edges))
+        phases = []
+        for e in range(len(self.edges)):
+            for col, dur in (("G", 15), ("y", 3)):
+                state = "".join(
+                    col if i // per_edge == e else "r" for i in range(len(self.lanes))
+                )
+                phases.append(Phase(dur, state))
+        return Logic("trace", 0, 0, phases)
+
+    # ---- traci module-level API ----
+    def start(self, cmd, port=None, numRetries=None, label="default", **kwargs):
+        self.index = -1
+        self.actions = []
+
+    def simulationStep(self, step=0.0):
+        # step > 0 means "advance until simulation time `step`" as in traci
+        target = int(step) - 1 if step > 0 else self.index + 1
+        self.index = max(self.index + 1, target)
+
+    def close(self, wait=True):
+        pass
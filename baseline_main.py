@@ -4,15 +4,20 @@ baseline_main.py
 Fixed-Time Traffic Signal Controller for SUMO
 Outputs:
  - performance_baseline.csv
- - frame.png
+ - frame.png (only with --snapshot)
 Author: Mokshitha (Final Clean Version)
 """
 
-import traci
+import launcher
+from backend import traci
+import argparse
 import os
-import time
+import numpy as np
 import pandas as pd
 
+from sensing import SubscriptionSensor
+from topology import load_topology, net_file_of
+
 # ---------------- PATH SETTINGS ----------------
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 SUMO_CONFIG = os.path.join(BASE_DIR, "simulation.sumocfg")
@@ -23,96 +28,90 @@ TLS_ID = "center"     # your real TLS ID
 
 GREEN_TIME = 15
 YELLOW_TIME = 3
+MAX_STEPS = 3600      # upper bound on run length; sizes the queue history
 
 DIRECTIONS = ["North", "East", "South", "West"]
 
 
-def detect_direction(lane_id):
-    lid = lane_id.lower()
-    if "north" in lid or "_n" in lid or lid.startswith("n"):
-        return "North"
-    if "south" in lid or "_s" in lid or lid.startswith("s"):
-        return "South"
-    if "east" in lid or "_e" in lid or lid.startswith("e"):
-        return "East"
-    if "west" in lid or "_w" in lid or lid.startswith("w"):
-        return "West"
-    return "North"
-
-
-def run_baseline():
+def run_baseline(seed=None, snapshot=False):
     print("\nStarting Baseline Fixed-Time Simulation...\n")
 
-    traci.start([
-        "sumo-gui",
-        "-c", SUMO_CONFIG,
-        "--start",
-        "--quit-on-end"
-    ])
+    launcher.start(SUMO_CONFIG, seed=seed)
 
-    lanes = traci.trafficlight.getControlledLanes(TLS_ID)
-    lanes = list(dict.fromkeys(lanes))  # keep order
+    # incoming lanes and their approach directions, from the network file
+    tls = load_topology(net_file_of(SUMO_CONFIG)).tls[TLS_ID]
+    lanes = [ln for e in tls.in_edges for ln in tls.lanes[e]]
 
-    lane_to_dir = {ln: detect_direction(ln) for ln in lanes}
+    # lane -> direction index, built once; per-step sums are a single bincount
+    lane_dir_idx = np.array(
+        [DIRECTIONS.index(tls.edge_dir[e].capitalize()) for e in tls.in_edges for _ in tls.lanes[e]],
+        dtype=np.intp
+    )
+    n_dirs = len(DIRECTIONS)
 
-    try:
-        view = traci.gui.getIDList()[0]
-    except:
-        view = None
+    sensor = SubscriptionSensor(lanes=lanes)
+    sensor.subscribe()
+    lane_counts_map = sensor.lane_counts
+
+    view = launcher.gui_view() if snapshot else None   # None when headless: no screenshot
 
     step = 0
-    queue_history = {d: [] for d in DIRECTIONS}
-    total_vehicles = set()
+    n_samples = 0
+    queue_history = np.zeros((MAX_STEPS, n_dirs), dtype=np.int32)
 
-    programs = traci.trafficlight.getCompleteRedYellowGreenDefinition(TLS_ID)
-    phases = programs[0].phases
-    green_phases = [i for i, p in enumerate(phases) if "G" in p.state]
+    # the static program from the network file
+    phases = tls.programs[0]["phases"] if tls.programs else []
+    green_phases = [i for i, (_, state) in enumerate(phases) if "G" in state]
 
     if not green_phases:
         print("ERROR: No green phases detected!")
         traci.close()
         return
 
-    while traci.simulation.getMinExpectedNumber() > 0:
+    while step < MAX_STEPS and sensor.min_expected > 0:
         for idx in green_phases:
 
             traci.trafficlight.setPhase(TLS_ID, idx)
 
             for _ in range(GREEN_TIME):
-                traci.simulationStep()
+                sensor.step()
                 step += 1
 
-                lane_counts = {
-                    ln: traci.lane.getLastStepVehicleNumber(ln)
-                    for ln in lanes
-                }
-
-                dir_counts = {d: 0 for d in DIRECTIONS}
-                for ln, c in lane_counts.items():
-                    dir_counts[lane_to_dir[ln]] += c
+                lane_counts = np.fromiter(
+                    (lane_counts_map[ln] for ln in lanes),
+                    dtype=np.int32, count=len(lanes)
+                )
 
-                for d in DIRECTIONS:
-                    queue_history[d].append(dir_counts[d])
-
-                for vid in traci.vehicle.getIDList():
-                    total_vehicles.add(vid)
-
-                if view and step % 5 == 0:
-                    traci.gui.screenshot(view, FRAME_PATH)
+                if n_samples < MAX_STEPS:
+                    queue_history[n_samples] = np.bincount(
+                        lane_dir_idx, weights=lane_counts, minlength=n_dirs
+                    )
+                    n_samples += 1
 
             for _ in range(YELLOW_TIME):
-                traci.simulationStep()
+                sensor.step()
                 step += 1
 
+    if view:
+        # one screenshot of the final state, only because --snapshot asked
+        # for it; sumo-gui writes it during the next step
+        traci.gui.screenshot(view, FRAME_PATH)
+        traci.simulationStep()
+
     traci.close()
 
+    if n_samples:
+        avg_queue = queue_history[:n_samples].mean(axis=0)
+    else:
+        avg_queue = np.zeros(n_dirs)
+
     rows = []
-    for d in DIRECTIONS:
-        avg_q = sum(queue_history[d]) / len(queue_history[d])
+    for i, d in enumerate(DIRECTIONS):
+        avg_q = float(avg_queue[i])
         rows.append({
             "region": d,
             "avg_queue": round(avg_q, 2),
-            "throughput": len(total_vehicles),
+            "throughput": sensor.arrived,
             "avg_green": GREEN_TIME
         })
 
@@ -123,4 +122,8 @@ def run_baseline():
 
 
 if __name__ == "__main__":
-    run_baseline()
+    parser = argparse.ArgumentParser(description="Fixed-time baseline controller")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="save the final GUI frame to frame.png")
+    args = launcher.parse_args(parser=parser)
+    run_baseline(seed=args.seed, snapshot=args.snapshot)
@@ -0,0 +1,128 @@
+# bench_controllers.py
+# Controller benchmark on the queue_sim stand-in simulator (no SUMO/GUI).
+#
+# For every policy x demand level x seed it reports
+#   speed    decisions/s of policy.decide() and simulated steps/s
+#   memory   peak traced allocation of one run (tracemalloc, separate pass)
+#   traffic  average delay, average/max/residual queue, throughput
+#
+# Results go to runs/bench.csv. A saved result file can serve as the
+# regression baseline: --baseline compares against it and exits non-zero
+# when a controller got slower or its delay got worse beyond tolerance.
+#
+#   python bench_controllers.py
+#   python bench_controllers.py --save bench_baseline.csv
+#   python bench_controllers.py --baseline bench_baseline.csv
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from policies import POLICIES, make_policy
+from queue_sim import DEMAND_LEVELS, STEPS, QueueSim, demand_rates
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+BENCH_CSV = os.path.join(BASE_DIR, "runs", "bench.csv")
+
+SPEED_TOLERANCE = 0.5     # fail below 50% of the baseline decisions/s
+DELAY_TOLERANCE = 0.05    # fail above +5% of the baseline delay (+0.5 s floor)
+
+KEY = ["policy", "demand", "seed"]
+
+
+def bench_one(policy_name, level, seed, steps=STEPS, memory=True):
+    sim = QueueSim(demand_rates(level), seed=seed)
+
+    t0 = time.perf_counter()
+    kpis = sim.run(make_policy(policy_name), steps)
+    wall = time.perf_counter() - t0
+
+    peak_kib = None
+    if memory:
+        tracemalloc.start()
+        sim.run(make_policy(policy_name), steps)
+        peak_kib = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+
+    row = {"policy": policy_name, "demand": level, "seed": seed}
+    row.update(kpis)
+    row["decisions_per_s"] = round(kpis["decisions"] / kpis["decide_s"]) if kpis["decide_s"] else 0
+    row["steps_per_s"] = round(steps / wall)
+    row["peak_kib"] = peak_kib
+    del row["decide_s"]
+    return row
+
+
+def run_bench(policies, levels, seeds, steps=STEPS, memory=True):
+    rows = []
+    for name in policies:
+        for level in levels:
+            for seed in seeds:
+                rows.append(bench_one(name, level, seed, steps, memory))
+    return pd.DataFrame(rows)
+
+
+def summarize(df):
+    """Mean over seeds per (policy, demand)."""
+    cols = ["avg_delay_s", "avg_queue", "max_queue", "residual_queue",
+            "throughput_vph", "avg_green", "decisions_per_s", "steps_per_s", "peak_kib"]
+    out = df.groupby(["demand", "policy"], sort=False)[cols].mean().round(2)
+    return out.reset_index()
+
+
+def check_regressions(df, baseline):
+    """Policies whose speed regressed and rows whose delay regressed vs `baseline`.
+
+    Decision timings are microseconds and noisy per run, so speed is
+    compared on the median over all demand levels and seeds of a policy.
+    """
+    speed = df.groupby("policy")["decisions_per_s"].median()
+    speed_base = baseline.groupby("policy")["decisions_per_s"].median()
+    ratio = (speed / speed_base).dropna()
+    slow = ratio[ratio < SPEED_TOLERANCE].round(2).rename("speed_ratio").reset_index()
+
+    m = df.merge(baseline, on=KEY, suffixes=("", "_base"))
+    worse = m[m["avg_delay_s"] > m["avg_delay_s_base"] * (1 + DELAY_TOLERANCE) + 0.5]
+    return slow, worse[KEY + ["avg_delay_s", "avg_delay_s_base"]]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Controller speed/quality benchmark (no SUMO)")
+    p.add_argument("--policies", nargs="+", choices=sorted(POLICIES), default=sorted(POLICIES))
+    p.add_argument("--demand", nargs="+", choices=list(DEMAND_LEVELS), default=list(DEMAND_LEVELS))
+    p.add_argument("--seeds", type=int, nargs="+", default=[1, 2, 3])
+    p.add_argument("--steps", type=int, default=STEPS)
+    p.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    p.add_argument("--out", default=BENCH_CSV)
+    p.add_argument("--save", default=None, help="also write results here as a new baseline")
+    p.add_argument("--baseline", default=None, help="compare against a saved result file")
+    args = p.parse_args()
+
+    df = run_bench(args.policies, args.demand, args.seeds, args.steps, not args.no_memory)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    df.to_csv(args.out, index=False)
+    if args.save:
+        df.to_csv(args.save, index=False)
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(summarize(df).to_string(index=False))
+    print("\nSaved:", args.out)
+
+    if args.baseline:
+        slow, worse = check_regressions(df, pd.read_csv(args.baseline))
+        if len(slow) or len(worse):
+            print("\nREGRESSIONS vs", args.baseline)
+            for bad in (slow, worse):
+                if len(bad):
+                    print(bad.to_string(index=False))
+            sys.exit(1)
+        print("No regressions vs", args.baseline)
+
+
+if __name__ == "__main__":
+    main()
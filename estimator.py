@@ -0,0 +1,126 @@
+# estimator.py
+# Per-approach vehicle count estimate fused from TraCI and the detector.
+#
+# Edge counts from the SUMO subscription are exact for the vehicles on the
+# approach edge and arrive every loop step, so the estimate follows them
+# with no lag. The detector sees what the edge count does not (queues
+# spilling back past the edge, vehicles on the junction): each approach
+# keeps a scalar Kalman filter over that offset,
+#
+#   estimate = edge count + offset
+#
+# - detector counts, sparse and late: a result for the frame taken at step s
+#   arrives some steps after s. Its residual against the edge count is
+#   applied once, with the variance grown by the process noise over that
+#   delay, so old frames weigh less.
+# - between detections the offset fades back towards 0 (OFFSET_DECAY per
+#   step) and its variance grows, so a stale or stopped detector leaves the
+#   plain edge counts.
+#
+# Updates are O(1) per approach; skipped steps (bulk advance) only age the
+# offsets. The junction-wide "all" camera has its own offset, on the total:
+# it moves total() (Fused_Total) but not any single approach. An approach
+# whose edge count is non-zero never reads as empty, and a detector that
+# sees fewer vehicles than the edge count never lowers the estimate below it
+# (the offset is used only where positive).
+#
+#   est = QueueEstimator(GROUPS)
+#   est.update_counts(step, q)                     # every loop step
+#   est.update_detection("north", det.step, det.count, step)
+#   est.counts()                                   # {group: int estimate}
+#   est.fill(rec.estimate)                         # same, into an int array
+
+TOTAL = "all"        # detector key of the junction-wide camera
+PROCESS_VAR = 0.5    # offset variance added per step
+OFFSET_DECAY = 0.98  # offset kept per step without detections
+R_DETECT = 4.0       # detector variance (occlusion, missed small vehicles)
+P0 = 25.0            # initial variance
+
+
+class _State:
+    __slots__ = ("b", "p", "step", "det_step", "z")
+
+    def __init__(self, p0):
+        self.b = 0.0          # detector offset
+        self.z = 0            # latest edge count
+        self.p = p0
+        self.step = 0
+        self.det_step = -1
+
+
+class QueueEstimator:
+    def __init__(self, groups, process_var=PROCESS_VAR, decay=OFFSET_DECAY,
+                 r_detect=R_DETECT, p0=P0):
+        self.groups = list(groups)
+        self.process_var = process_var
+        self.decay = decay
+        self.r_detect = r_detect
+        self.p0 = p0
+        self.reset()
+
+    def reset(self):
+        self.state = {g: _State(self.p0) for g in self.groups}
+        self.all = _State(self.p0)
+        self.detections = 0
+
+    def _predict(self, s, step):
+        if step > s.step:
+            n = step - s.step
+            s.b *= self.decay ** n
+            s.p += self.process_var * n
+            s.step = step
+
+    def update_counts(self, step, counts):
+        """Edge counts {group: n} observed at `step`."""
+        for g, s in self.state.items():
+            self._predict(s, step)
+            z = counts.get(g)
+            if z is not None:
+                s.z = z
+        self._predict(self.all, step)
+        self.all.z = sum(s.z for s in self.state.values())
+
+    def update_detection(self, key, det_step, count, step):
+        """Detector count for `key` (an approach or "all") from the frame taken at `det_step`."""
+        s = self.all if key == TOTAL else self.state.get(key)
+        if s is None or det_step <= s.det_step:
+            return False
+        s.det_step = det_step
+        self._predict(s, step)
+        seen = s.z
+        if s is self.all:
+            seen += sum(max(0.0, a.b) for a in self.state.values())
+        delay = max(0, step - det_step)
+        k = s.p / (s.p + self.r_detect + self.process_var * delay)
+        s.b += k * (count - seen - s.b)
+        s.p *= 1.0 - k
+        self.detections += 1
+        return True
+
+    def estimate(self, g):
+        s = self.state[g]
+        return s.z + max(0.0, s.b)
+
+    def variance(self, g):
+        return self.state[g].p
+
+    @staticmethod
+    def _rounded(s):
+        # exact edge count plus the offset, half rounding up
+        return s.z + int(max(0.0, s.b) + 0.5)
+
+    def counts(self):
+        """{group: rounded estimate}, what the policies see as obs.counts."""
+        return {g: self._rounded(s) for g, s in self.state.items()}
+
+    def fill(self, out):
+        """Write the rounded estimates into `out`, indexed in `groups` order."""
+        i = 0
+        for s in self.state.values():
+            out[i] = self._rounded(s)
+            i += 1
+        return out
+
+    def total(self):
+        """Junction total: the approach estimates plus the "all" camera's offset."""
+        return sum(self.estimate(g) for g in self.groups) + max(0.0, self.all.b)
@@ -0,0 +1,172 @@
+# experiments.py
+# Parallel multi-seed experiment runner.
+#
+# Runs every (scenario, controller, seed) combination in its own worker
+# process, each with its own SUMO instance and TraCI label, and writes each
+# run into its own directory:
+#
+#   runs/<scenario>/<controller>/seed_<seed>/performance_<controller>.{npz,csv}
+#
+# Controllers are policy names from policies.POLICIES. Results are merged
+# into runs/comparison.csv with 95% confidence intervals.
+#
+#   python experiments.py --seeds 1 2 3 4 5 --controllers fixed_time fairness_density --workers 4
+
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import launcher
+from policies import POLICIES
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+RUNS_DIR = os.path.join(BASE_DIR, "runs")
+DEFAULT_SCENARIO = os.path.join(BASE_DIR, "simulation.sumocfg")
+
+DIRS = ["North", "East", "South", "West"]
+TRIP_METRICS = ["mean_delay_s", "mean_waiting_s", "mean_stops"]   # from SUMO tripinfo
+
+# two-sided 95% Student-t critical values, used when scipy is missing: t_crit
+# takes the nearest tabulated dof at or below, so it never undershoots
+T_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365,
+    8: 2.306, 9: 2.262, 10: 2.228, 11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145,
+    15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093, 20: 2.086,
+    25: 2.060, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980,
+}
+
+
+def t_crit(dof):
+    if dof <= 0:
+        return float("nan")
+    try:
+        from scipy.stats import t
+        return float(t.ppf(0.975, dof))
+    except ImportError:
+        pass
+    # nearest tabulated dof below: slightly wide intervals, never too narrow
+    return T_95[max(k for k in T_95 if k <= dof)]
+
+
+def scenario_name(config):
+    return os.path.splitext(os.path.basename(config))[0]
+
+
+def run_dir(out_root, config, controller, seed):
+    return os.path.join(out_root, scenario_name(config), controller, f"seed_{seed}")
+
+
+# ==========================================================
+# WORKER
+# ==========================================================
+def run_one(job):
+    """Run one (scenario, controller, seed) in this worker process."""
+    config, controller, seed, out_dir, mode, trace, max_steps = job
+    launcher.configure(mode, trace)
+
+    import adaptive_compare as ac
+    from policies import make_policy
+    from runlog import load_run
+
+    log_name = f"performance_{controller}.csv"
+    t0 = time.perf_counter()
+    res = ac.run_policy(make_policy(controller), log_name, max_steps=max_steps, seed=seed,
+                        out_dir=out_dir, config=config,
+                        label=f"{controller}-{seed}-{os.getpid()}", use_yolo=False,
+                        sumo_outputs=mode != "trace",
+                        live=False)   # parallel workers would mix their streams on one port
+    wall = time.perf_counter() - t0
+
+    df = load_run(os.path.join(out_dir, log_name))
+    avg = df[DIRS].mean() if len(df) else pd.Series(0.0, index=DIRS)
+    row = {
+        "scenario": scenario_name(config),
+        "controller": controller,
+        "seed": seed,
+        "steps": res["steps"],
+        "throughput": res["throughput"],
+        "avg_queue": float(avg.sum()),
+        "wall_s": round(wall, 3),
+    }
+    row.update({f"avg_{d.lower()}": float(avg[d]) for d in DIRS})
+    trips = (res.get("kpis") or {}).get("approaches", {}).get("all")
+    if trips:
+        row.update({m: trips[m] for m in TRIP_METRICS})
+    return row
+
+
+# ==========================================================
+# MERGE
+# ==========================================================
+def compare(results):
+    """Mean, std and 95% CI half-width per scenario/controller."""
+    df = pd.DataFrame(results)
+    metrics = ["avg_queue", "throughput"] + [f"avg_{d.lower()}" for d in DIRS] + ["wall_s"]
+    metrics += [m for m in TRIP_METRICS if m in df.columns]
+    rows = []
+    for (scen, ctrl), g in df.groupby(["scenario", "controller"]):
+        n = len(g)
+        row = {"scenario": scen, "controller": ctrl, "n": n}
+        for m in metrics:
+            mean = g[m].mean()
+            sd = g[m].std(ddof=1) if n > 1 else float("nan")
+            row[f"{m}_mean"] = round(mean, 3)
+            row[f"{m}_ci95"] = round(t_crit(n - 1) * sd / math.sqrt(n), 3) if n > 1 else float("nan")
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def run_experiments(seeds, scenarios=(DEFAULT_SCENARIO,), controllers=("fixed_time", "fairness_density"),
+                    workers=None, out_root=RUNS_DIR, mode="sumo", trace=None,
+                    max_steps=1200):
+    jobs = [
+        (cfg, ctrl, seed, run_dir(out_root, cfg, ctrl, seed), mode, trace, max_steps)
+        for cfg in scenarios for ctrl in controllers for seed in seeds
+    ]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_one, job): job for job in jobs}
+        for fut in as_completed(futures):
+            cfg, ctrl, seed = futures[fut][:3]
+            try:
+                results.append(fut.result())
+                print(f"done: {scenario_name(cfg)} / {ctrl} / seed {seed}")
+            except Exception as e:
+                print(f"FAILED: {scenario_name(cfg)} / {ctrl} / seed {seed}: {e}")
+
+    os.makedirs(out_root, exist_ok=True)
+    pd.DataFrame(results).to_csv(os.path.join(out_root, "runs.csv"), index=False)
+    table = compare(results) if results else pd.DataFrame()
+    table.to_csv(os.path.join(out_root, "comparison.csv"), index=False)
+    return table
+
+
+def main():
+    p = argparse.ArgumentParser(description="Parallel multi-seed controller comparison")
+    p.add_argument("--seeds", type=int, nargs="+", default=[1, 2, 3, 4, 5])
+    p.add_argument("--scenarios", nargs="+", default=[DEFAULT_SCENARIO],
+                   help="SUMO config files")
+    p.add_argument("--controllers", nargs="+", default=["fixed_time", "fairness_density"],
+                   choices=sorted(POLICIES))
+    p.add_argument("--workers", type=int, default=None, help="default: CPU count")
+    p.add_argument("--steps", type=int, default=1200)
+    p.add_argument("--out", default=RUNS_DIR)
+    p.add_argument("--mode", choices=[m for m in launcher.MODES if m != "gui"], default="sumo")
+    p.add_argument("--trace", default=None, help="run log to replay in --mode trace")
+    args = p.parse_args()
+
+    table = run_experiments(
+        args.seeds, [os.path.abspath(s) for s in args.scenarios], args.controllers,
+        workers=args.workers, out_root=args.out, mode=args.mode,
+        trace=args.trace and os.path.abspath(args.trace), max_steps=args.steps,
+    )
+    with pd.option_context("display.width", 200, "display.max_columns", 50):
+        print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+# frames.py
+# Frame sources for the detector.
+#
+# Frames reach the detector as decoded in-memory arrays (H x W x 3 uint8,
+# BGR like OpenCV/ultralytics expect). Nothing is written to the project
+# folder unless snapshot() is called explicitly.
+#
+#   GuiFrameSource        sumo-gui screenshots via an uncompressed BMP on
+#                         tmpfs (/dev/shm), decoded into reusable buffers
+#   SyntheticFrameSource  generated frames, no GUI (benchmarks)
+#
+# Both follow the same protocol:
+#   request(step)   ask for a frame of the current step
+#   after_step()    call after each simulationStep(); returns (step, frame)
+#                   once the requested frame is ready, else None
+#   snapshot(path)  write the last frame to disk
+
+import os
+import tempfile
+
+import numpy as np
+
+from backend import traci
+
+FRAME_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def save_frame(frame, path):
+    from PIL import Image
+    Image.fromarray(np.ascontiguousarray(frame[..., ::-1])).save(path)
+
+
+class _BufferRing:
+    # a few reusable frame buffers; a buffer is only rewritten after
+    # `slots - 1` newer frames. At the usual cadence (a frame every few
+    # steps) the detector has long consumed it by then; sources that
+    # request frames every step use copy=True instead.
+    def __init__(self, slots):
+        self.slots = slots
+        self._bufs = [None] * slots
+        self._n = 0
+        self.last = None
+
+    def next(self, shape):
+        i = self._n % self.slots
+        self._n += 1
+        buf = self._bufs[i]
+        if buf is None or buf.shape != shape:
+            buf = self._bufs[i] = np.empty(shape, dtype=np.uint8)
+        self.last = buf
+        return buf
+
+
+class GuiFrameSource:
+    """sumo-gui view -> in-memory BGR frames.
+
+    traci.gui.screenshot can only write files, so it writes an uncompressed
+    BMP to tmpfs (no PNG encode/decode, no disk I/O). SUMO writes the file
+    at the end of the next simulation step, so a frame requested at step N
+    is returned by after_step() one step later, still tagged N.
+
+    copy=True returns a fresh array per frame instead of a reused buffer,
+    for when frames may outlive `slots` steps in the detector's queue.
+    """
+
+    def __init__(self, view_id, slots=4, frame_dir=FRAME_DIR, copy=False):
+        self.view_id = view_id
+        self.copy = copy
+        self._ring = _BufferRing(slots)
+        self._tmp = os.path.join(frame_dir, f"sumo_frame_{os.getpid()}_{id(self)}.bmp")
+        self._pending = None
+
+    def request(self, step):
+        try:
+            traci.gui.screenshot(self.view_id, self._tmp)
+            self._pending = step
+        except Exception:
+            self._pending = None
+
+    def after_step(self):
+        if self._pending is None:
+            return None
+        step, self._pending = self._pending, None
+        try:
+            from PIL import Image
+            with Image.open(self._tmp) as img:
+                rgb = np.asarray(img.convert("RGB"))
+        except Exception:
+            return None
+        if self.copy:
+            buf = self._ring.last = np.ascontiguousarray(rgb[..., ::-1])
+        else:
+            buf = self._ring.next(rgb.shape)
+            np.copyto(buf, rgb[..., ::-1])
+        return step, buf
+
+    def snapshot(self, path):
+        if self._ring.last is not None:
+            save_frame(self._ring.last, path)
+
+    def close(self):
+        try:
+            os.remove(self._tmp)
+        except OSError:
+            pass
+
+
+class SyntheticFrameSource:
+    """Deterministic generated frames: a 4-arm junction with box 'vehicles'.
+
+    Useful to benchmark the detector path without SUMO or a GUI.
+    """
+
+    def __init__(self, width=1280, height=720, vehicles=(5, 40), slots=4, seed=0):
+        self.shape = (height, width, 3)
+        self.vehicles = vehicles
+        self._rng = np.random.default_rng(seed)
+        self._ring = _BufferRing(slots)
+        self._pending = None
+        h, w = height, width
+        bg = np.full(self.shape, 60, dtype=np.uint8)
+        bg[h // 2 - h // 10: h // 2 + h // 10, :] = 110        # east-west road
+        bg[:, w // 2 - h // 10: w // 2 + h // 10] = 110        # north-south road
+        self._bg = bg
+
+    def render(self):
+        frame = self._ring.next(self.shape)
+        np.copyto(frame, self._bg)
+        h, w = self.shape[:2]
+        lo, hi = self.vehicles
+        n = int(self._rng.integers(lo, hi + 1))
+        ys = self._rng.integers(0, h - 12, n)
+        xs = self._rng.integers(0, w - 24, n)
+        colors = self._rng.integers(0, 256, (n, 3), dtype=np.uint8)
+        for y, x, c in zip(ys, xs, colors):
+            frame[y:y + 12, x:x + 24] = c
+        return frame
+
+    def request(self, step):
+        self._pending = step
+
+    def after_step(self):
+        if self._pending is None:
+            return None
+        step, self._pending = self._pending, None
+        return step, self.render()
+
+    def snapshot(self, path):
+        if self._ring.last is not None:
+            save_frame(self._ring.last, path)
+
+    def close(self):
+        pass
+
+
+# ==========================================================
+# CAMERA SETS (several views feeding one BatchDetector)
+# ==========================================================
+class CameraSet:
+    """Several named frame sources polled together.
+
+    after_step() returns [(key, step, frame), ...] for every source whose
+    frame became ready, ready to go into BatchDetector.submit().
+    """
+
+    def __init__(self, sources):
+        self.sources = dict(sources)
+
+    def keys(self):
+        return list(self.sources)
+
+    def request(self, step):
+        for src in self.sources.values():
+            src.request(step)
+
+    def after_step(self):
+        ready = []
+        for key, src in self.sources.items():
+            r = src.after_step()
+            if r is not None:
+                ready.append((key,) + r)
+        return ready
+
+    def snapshot(self, path):
+        stem, ext = os.path.splitext(path)
+        for key, src in self.sources.items():
+            src.snapshot(f"{stem}_{key}{ext}")
+
+    def close(self):
+        for src in self.sources.values():
+            src.close()
+
+
+def _edge_center(edge_id):
+    shape = traci.lane.getShape(f"{edge_id}_0")
+    (x0, y0), (x1, y1) = shape[0], shape[-1]
+    return (x0 + x1) / 2.0, (y0 + y1) / 2.0
+
+
+def approach_cameras(approach_edges, zoom=800, slots=4, copy=False):
+    """One extra sumo-gui view per approach, centred on its incoming edge."""
+    sources = {}
+    for name, edge in approach_edges.items():
+        view = f"cam_{name}"
+        traci.gui.addView(view)
+        x, y = _edge_center(edge)
+        traci.gui.setOffset(view, x, y)
+        traci.gui.setZoom(view, zoom)
+        sources[name] = GuiFrameSource(view, slots, copy=copy)
+    return CameraSet(sources)
+
+
+# ==========================================================
+# BENCHMARK: python frames.py [--n 200] [--yolo]
+# ==========================================================
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    p = argparse.ArgumentParser(description="Detector-path benchmark on synthetic frames")
+    p.add_argument("--n", type=int, default=200)
+    p.add_argument("--width", type=int, default=1280)
+    p.add_argument("--height", type=int, default=720)
+    p.add_argument("--yolo", action="store_true", help="also time YOLO inference")
+    args = p.parse_args()
+
+    src = SyntheticFrameSource(args.width, args.height)
+    t0 = time.perf_counter()
+    for i in range(args.n):
+        src.request(i)
+        src.after_step()
+    dt = time.perf_counter() - t0
+    print(f"frame source: {args.n / dt:.1f} frames/s")
+
+    if args.yolo:
+        from ultralytics import YOLO
+        model = YOLO("yolov8n.pt")
+        model(src.render(), verbose=False)   # warm-up
+        t0 = time.perf_counter()
+        for i in range(args.n):
+            model(src.render(), verbose=False)
+        dt = time.perf_counter() - t0
+        print(f"yolo: {args.n / dt:.1f} frames/s ({1000 * dt / args.n:.1f} ms/frame)")
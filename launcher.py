@@ -0,0 +1,120 @@
+# launcher.py
+# One place that starts SUMO for every entry point.
+#
+#   --mode gui      sumo-gui, interactive (default)
+#   --mode sumo     headless sumo over the TraCI socket
+#   --mode libsumo  headless, SUMO loaded in-process through libsumo
+#                   (falls back to the TraCI socket if libsumo is missing)
+#   --mode trace    no SUMO at all: replay a recorded run log (--trace PATH)
+#
+# The mode can also come from the SUMO_MODE environment variable, which is
+# handy when a script is started as a subprocess (e.g. from streamlit_app).
+
+import argparse
+import os
+import random
+
+import backend
+from backend import traci
+
+MODES = ("gui", "sumo", "libsumo", "trace")
+MODE = os.environ.get("SUMO_MODE", "gui")
+if MODE not in MODES:
+    MODE = "gui"
+TRACE_FILE = None
+
+GUI_FAST_FILE = "gui_fast.xml"
+GUI_FAST_XML = """
+<viewsettings>
+    <delay value="0"/>
+    <antialiasing value="false"/>
+    <showLaneBorders value="false"/>
+    <showLinkDecals value="false"/>
+    <background value="0,0,0"/>
+</viewsettings>
+"""
+
+
+# ==========================================================
+# CLI
+# ==========================================================
+def add_args(parser):
+    parser.add_argument("--mode", choices=MODES, default=MODE,
+                        help="gui = sumo-gui, sumo/libsumo = headless batch run, "
+                             "trace = replay a recorded run log")
+    parser.add_argument("--trace", default=None,
+                        help="run log (.npz/.csv) to replay in --mode trace")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="SUMO random seed (default: random)")
+    return parser
+
+
+def parse_args(argv=None, description=None, parser=None):
+    """Parse the launcher flags (plus any extra ones already on `parser`)."""
+    parser = add_args(parser or argparse.ArgumentParser(description=description))
+    args = parser.parse_args(argv)
+    if args.mode == "trace" and not args.trace:
+        parser.error("--mode trace needs --trace PATH")
+    configure(args.mode, args.trace)
+    return args
+
+
+def configure(mode, trace_file=None):
+    global MODE, TRACE_FILE
+    MODE = mode
+    TRACE_FILE = trace_file
+
+
+def is_gui():
+    return MODE == "gui"
+
+
+# ==========================================================
+# START
+# ==========================================================
+def ensure_gui_fast_file(path=GUI_FAST_FILE):
+    if os.path.exists(path):
+        return
+    with open(path, "w") as f:
+        f.write(GUI_FAST_XML)
+
+
+def sumo_cmd(config, seed=None, extra=()):
+    if is_gui():
+        ensure_gui_fast_file()
+        cmd = ["sumo-gui", "-c", config, "--start", "--quit-on-end",
+               f"--gui-settings-file={GUI_FAST_FILE}"]
+    else:
+        cmd = ["sumo", "-c", config, "--no-step-log", "true"]
+    if seed is not None:
+        cmd += ["--seed", str(seed)]
+    return cmd + list(extra)
+
+
+def start(config, seed=None, extra=(), label=None):
+    """Start SUMO in the selected mode and return the seed used."""
+    if seed is None:
+        seed = random.randint(1, 999999)
+    if MODE == "libsumo":
+        backend.use("libsumo")
+    elif MODE == "trace":
+        backend.use("trace", path=TRACE_FILE)
+    else:
+        backend.use("traci")
+    cmd = sumo_cmd(config, seed, extra)
+    if label is None:
+        traci.start(cmd)
+    else:
+        traci.start(cmd, label=label)
+    print(f"Using SUMO seed: {seed} (mode: {MODE}, backend: {backend.NAME})")
+    return seed
+
+
+def gui_view():
+    """First GUI view id, or None when running headless."""
+    if not is_gui():
+        return None
+    try:
+        return traci.gui.getIDList()[0]
+    except Exception:
+        return None
@@ -0,0 +1,104 @@
+# live_channel.py
+# Local telemetry channel: the control loop publishes per-step metrics,
+# the dashboard subscribes and plots them while the run is going.
+#
+# Transport is one UDP datagram per message on the loopback interface
+# (works on Windows and Linux, no broker). Publishing never blocks: with no
+# subscriber, or a full socket buffer, the message is dropped and counted.
+# The subscriber keeps only the last `maxlen` messages per run.
+#
+#   pub = Publisher()
+#   pub.publish({"run": "fixed_time", "step": 10, "North": 3, ...})
+#
+#   sub = Subscriber()
+#   sub.poll()                  # drain what arrived, never blocks
+#   sub.frame("fixed_time")     # DataFrame of the retained messages
+
+import json
+import os
+import socket
+from collections import deque
+
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("SIM_TELEMETRY_PORT", 47800))
+MAXLEN = 3000            # messages kept per run by a subscriber
+MAX_DATAGRAM = 65507
+
+
+class Publisher:
+    def __init__(self, host=HOST, port=PORT):
+        self.addr = (host, port)
+        self.sent = 0
+        self.dropped = 0
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+
+    def publish(self, msg):
+        data = json.dumps(msg, separators=(",", ":")).encode("utf-8")
+        try:
+            self._sock.sendto(data, self.addr)
+            self.sent += 1
+        except OSError:
+            # nobody listening / buffer full: the loop must not wait
+            self.dropped += 1
+
+    def close(self):
+        self._sock.close()
+
+
+class Subscriber:
+    """Receives published messages; grouped by their "run" field."""
+
+    def __init__(self, host=HOST, port=PORT, maxlen=MAXLEN):
+        self.maxlen = maxlen
+        self.runs = {}
+        self.received = 0
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self._sock.bind((host, port))
+        self._sock.setblocking(False)
+
+    def poll(self, limit=100000):
+        """Drain pending messages; returns how many were read."""
+        n = 0
+        while n < limit:
+            try:
+                data = self._sock.recv(MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                break
+            except ConnectionResetError:
+                # Windows reports an earlier failed send this way; skip it
+                continue
+            except OSError:
+                # socket closed or broken: stop instead of spinning
+                break
+            try:
+                msg = json.loads(data)
+            except ValueError:
+                continue
+            run = msg.get("run", "")
+            buf = self.runs.get(run)
+            if buf is None:
+                buf = self.runs[run] = deque(maxlen=self.maxlen)
+            buf.append(msg)
+            n += 1
+        self.received += n
+        return n
+
+    def latest(self, run=None):
+        if run is None:
+            if not self.runs:
+                return None
+            run = list(self.runs)[-1]
+        buf = self.runs.get(run)
+        return buf[-1] if buf else None
+
+    def frame(self, run):
+        import pandas as pd
+        return pd.DataFrame(list(self.runs.get(run, ())))
+
+    def clear(self):
+        self.runs.clear()
+
+    def close(self):
+        self._sock.close()
@@ -0,0 +1,195 @@
+# live_summary.py
+# Incremental summaries of run logs for the dashboard.
+#
+# RunAggregator tails one run log: each refresh() reads only the bytes
+# appended since the last call (complete lines only; a half-written last
+# line waits for the next refresh) and folds them into running per-direction
+# sums, counts and histograms. A refresh costs O(new rows), so the
+# dashboard stays fast while a long simulation is still writing.
+#
+# Both layouts the dashboard understands are handled from the header:
+#   wide     Step,North,East,South,West,...   (simulation run logs)
+#   region   region,avg_queue[,throughput]    (create_test_csvs.py demo files)
+# A `throughput` column, when present, gives the total; otherwise the total
+# is the sum of the per-direction counts.
+#
+# A restarted run (file truncated or rewritten) is detected and re-read
+# from the start. A run that only has the .npz log (WRITE_CSV off) is
+# loaded whole, and again only when the file changes.
+
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from runlog import runlog_path, read_runlog
+
+DIRS = ["North", "East", "South", "West"]
+HIST_BINS = 64          # per-direction histogram of counts 0..63, last bin = 63+
+MAX_POINTS = 2000       # time series kept for plotting, decimated beyond this
+
+
+class RunAggregator:
+    def __init__(self, path, max_points=MAX_POINTS):
+        self.path = path
+        self.max_points = max_points
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.rows = 0
+        self.layout = None
+        self._names = None
+        self._cols = {}
+        self._check = b""            # last line read, to detect rewrites
+        self._npz_mtime = None
+        self.count = dict.fromkeys(DIRS, 0)
+        self.sum = dict.fromkeys(DIRS, 0.0)
+        self.hist = {d: np.zeros(HIST_BINS, dtype=np.int64) for d in DIRS}
+        self.throughput = None
+        self.vehicles = 0.0
+        # decimated time series: keep every `_stride`-th wide row
+        self._stride = 1
+        self._series = []
+
+    # ---------- reading ----------
+    def refresh(self):
+        """Fold newly written rows in; returns how many were added."""
+        if os.path.exists(self.path):
+            return self._tail_csv()
+        npz = runlog_path(self.path)
+        if os.path.exists(npz):
+            return self._load_npz(npz)
+        if self.rows:
+            self.reset()
+        return 0
+
+    def _tail_csv(self):
+        size = os.path.getsize(self.path)
+        with open(self.path, "rb") as f:
+            if self.offset and (size < self.offset or not self._same_prefix(f)):
+                self.reset()
+            if size == self.offset:
+                return 0
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            return 0
+        chunk = chunk[:end]
+        self._check = chunk[chunk.rfind(b"\n", 0, end - 1) + 1:]
+        if self.offset == 0:
+            header, _, chunk = chunk.partition(b"\n")
+            self._set_header(header.decode("utf-8-sig").strip())
+        self.offset += end
+        if not chunk.strip() or self.layout is None:
+            return 0
+
+        df = pd.read_csv(io.BytesIO(chunk), names=self._names, header=None)
+        self._fold(df)
+        return len(df)
+
+    def _same_prefix(self, f):
+        # the last line we read must still be where we read it
+        n = len(self._check)
+        if not n:
+            return True
+        f.seek(self.offset - n)
+        return f.read(n) == self._check
+
+    def _load_npz(self, npz):
+        mtime = os.path.getmtime(npz)
+        if mtime == self._npz_mtime:
+            return 0
+        self.reset()
+        self._npz_mtime = mtime
+        df = read_runlog(npz)
+        self._set_header(",".join(df.columns))
+        if self.layout is None:
+            return 0
+        self._fold(df)
+        return len(df)
+
+    def _set_header(self, header):
+        self._names = [c.strip() for c in header.split(",")]
+        lower = {c.lower(): c for c in self._names}
+        self._cols = lower
+        if all(d.lower() in lower for d in DIRS):
+            self.layout = "wide"
+        elif "region" in lower and "avg_queue" in lower:
+            self.layout = "region"
+        else:
+            self.layout = None
+        if "throughput" in lower:
+            self.throughput = 0.0
+
+    # ---------- aggregation ----------
+    def _fold(self, df):
+        c = self._cols
+        if "throughput" in c:
+            self.throughput += float(pd.to_numeric(df[c["throughput"]], errors="coerce").sum())
+
+        if self.layout == "wide":
+            vals = df[[c[d.lower()] for d in DIRS]].apply(pd.to_numeric, errors="coerce")
+            for d, col in zip(DIRS, vals.columns):
+                v = vals[col].dropna().to_numpy()
+                self._add(d, v)
+            self.vehicles += float(np.nansum(vals.to_numpy()))
+            step_col = c.get("step") or c.get("time")
+            steps = df[step_col].to_numpy() if step_col else np.arange(self.rows, self.rows + len(df))
+            self._append_series(steps, vals.to_numpy())
+        else:
+            region = df[c["region"]].astype(str).str.strip().str.capitalize()
+            q = pd.to_numeric(df[c["avg_queue"]], errors="coerce")
+            for d in DIRS:
+                self._add(d, q[region == d].dropna().to_numpy())
+        self.rows += len(df)
+
+    def _add(self, d, v):
+        if not len(v):
+            return
+        self.count[d] += len(v)
+        self.sum[d] += float(v.sum())
+        idx = np.clip(v.astype(np.int64), 0, HIST_BINS - 1)
+        self.hist[d] += np.bincount(idx, minlength=HIST_BINS)
+
+    def _append_series(self, steps, vals):
+        start = self.rows
+        keep = (np.arange(start, start + len(steps)) % self._stride) == 0
+        for s, row in zip(steps[keep], vals[keep]):
+            self._series.append((s, *row))
+        while len(self._series) > self.max_points:
+            # halve the resolution; stays aligned to multiples of the stride
+            self._series = self._series[::2]
+            self._stride *= 2
+
+    # ---------- queries ----------
+    def avg_queue(self):
+        return {d: (self.sum[d] / self.count[d] if self.count[d] else None) for d in DIRS}
+
+    def total(self):
+        if self.throughput is not None:
+            return int(self.throughput)
+        if self.layout == "wide":
+            return int(self.vehicles)
+        return None
+
+    def time_series(self):
+        if not self._series:
+            return None
+        return pd.DataFrame(self._series, columns=["Step"] + DIRS)
+
+
+class LiveSummary:
+    """One RunAggregator per run log, refreshed together."""
+
+    def __init__(self, paths):
+        self.runs = {name: RunAggregator(p) for name, p in paths.items()}
+
+    def refresh(self):
+        return {name: agg.refresh() for name, agg in self.runs.items()}
+
+    def __getitem__(self, name):
+        return self.runs[name]
@@ -0,0 +1,298 @@
+# multi_tls.py
+# Fairness + density control for every traffic light in the network.
+#
+# Generalizes the single-TLS loop in adaptive_compare.adaptive_run:
+#  - traffic lights and their controlled links come from the network
+#    file (topology.py); one green + yellow phase per approach
+#  - the fairness/density decision runs for all junctions at once on
+#    (junctions x approaches) NumPy arrays, so per-step Python work does
+#    not grow with the number of signals; only actual phase switches
+#    cost a TraCI call each.
+#
+#   python multi_tls.py --mode sumo --seed 1
+
+import os
+
+import numpy as np
+
+import launcher
+from backend import traci
+from runlog import RunLog
+from sensing import SubscriptionSensor
+from topology import load_topology, net_file_of
+from policies import GROUPS, Observation, FairnessDensity as ScalarFairnessDensity
+
+SUMO_CONFIG = "simulation.sumocfg"
+MULTI_CSV = "performance_multi.csv"
+MAX_STEPS = 1200
+
+MIN_G, MAX_G = 12, 45
+YEL = 3
+
+
+# ==========================================================
+# NETWORK INDEX
+# ==========================================================
+class JunctionIndex:
+    """Approaches and approach->phase mapping for a set of traffic lights.
+
+    approaches[j]   incoming edge ids of junction j, in link order
+    edge_idx        (J, A) indices into `edges`; padding points at a zero slot
+    valid           (J, A) mask of real approaches
+    Approach a of every junction is green in phase 2a, yellow in 2a+1.
+    """
+
+    def __init__(self, topo, tls_ids=None):
+        self.tls_ids = list(tls_ids) if tls_ids is not None else list(topo.tls)
+        self.links = {}
+        self.approaches = []
+        for tls in self.tls_ids:
+            info = topo.tls[tls]
+            self.links[tls] = [lk.from_edge if lk else None for lk in info.links]
+            self.approaches.append(list(info.in_edges))
+
+        self.edges = list(dict.fromkeys(e for a in self.approaches for e in a))
+        pos = {e: i for i, e in enumerate(self.edges)}
+        pad = len(self.edges)                      # index of the zero slot
+        J = len(self.tls_ids)
+        A = max((len(a) for a in self.approaches), default=0)
+        self.edge_idx = np.full((J, A), pad, dtype=np.intp)
+        self.valid = np.zeros((J, A), dtype=bool)
+        for j, appr in enumerate(self.approaches):
+            self.edge_idx[j, :len(appr)] = [pos[e] for e in appr]
+            self.valid[j, :len(appr)] = True
+        self.n_approaches = self.valid.sum(axis=1)
+
+    @property
+    def shape(self):
+        return self.valid.shape
+
+    def phase_states(self, tls):
+        """Green/yellow state strings, one pair per approach."""
+        in_edges = self.links[tls]
+        j = self.tls_ids.index(tls)
+        states = []
+        for appr in self.approaches[j]:
+            for col in ("G", "y"):
+                states.append("".join(col if e == appr else "r" for e in in_edges))
+        return states
+
+    def install(self, green=15, yellow=3):
+        for tls in self.tls_ids:
+            states = self.phase_states(tls)
+            if not states:
+                continue
+            phases = [
+                traci.trafficlight.Phase(green if i % 2 == 0 else yellow, st)
+                for i, st in enumerate(states)
+            ]
+            logic = traci.trafficlight.Logic("multi", 0, 0, phases)
+            traci.trafficlight.setProgramLogic(tls, logic)
+
+    def counts(self, sensor, out=None):
+        """(J, A) approach vehicle counts from the subscription cache."""
+        flat = np.fromiter(
+            (sensor.edge_counts[e] for e in self.edges), dtype=np.int32, count=len(self.edges)
+        )
+        flat = np.append(flat, 0)
+        return np.take(flat, self.edge_idx, out=out)
+
+
+# ==========================================================
+# VECTORIZED FAIRNESS + DENSITY
+# ==========================================================
+class VectorFairnessDensity:
+    """policies.FairnessDensity, applied to all junctions per call.
+
+    Per junction: while `rotation < #active` serve the active approaches in
+    a cycle ordered by queue (longest first); then serve the single longest
+    queue once and start a new cycle. Green = q[sel]*5 + min(q)*2, clipped.
+    check_rule() replays random counts through both and compares them.
+    """
+
+    def __init__(self, index, min_g=MIN_G, max_g=MAX_G):
+        J, A = index.shape
+        self.valid = index.valid
+        self.min_g, self.max_g = min_g, max_g
+        self.rotation = np.zeros(J, dtype=np.int32)
+        self.cycle = np.zeros((J, A), dtype=np.intp)
+        self.cycle_len = np.zeros(J, dtype=np.int32)
+        self.cycle_index = np.zeros(J, dtype=np.int32)
+        self._rows = np.arange(J)
+
+    def decide(self, q, due=None):
+        """q: (J, A) counts -> (has_active, selected approach, green time).
+
+        due: optional (J,) mask of the junctions deciding now; the others
+        keep their rotation state and report has_active False.
+        """
+        active = (q > 0) & self.valid
+        if due is not None:
+            active &= due[:, None]
+        n_active = active.sum(axis=1)
+        has = n_active > 0
+        fair = has & (self.rotation < n_active)
+        longest = ~fair & has
+
+        # start a new cycle: active approaches, longest queue first (stable)
+        new = fair & (self.cycle_len == 0)
+        if new.any():
+            key = np.where(active[new], -q[new], np.iinfo(np.int32).max)
+            self.cycle[new] = np.argsort(key, axis=1, kind="stable")
+            self.cycle_len[new] = n_active[new]
+            self.cycle_index[new] = 0
+
+        selected = np.zeros(len(q), dtype=np.intp)
+        if fair.any():
+            pos = self.cycle_index[fair] % np.maximum(self.cycle_len[fair], 1)
+            selected[fair] = self.cycle[fair, pos]
+            self.cycle_index[fair] += 1
+            self.rotation[fair] += 1
+        if longest.any():
+            selected[longest] = np.argmax(np.where(active[longest], q[longest], -1), axis=1)
+            self.rotation[longest] = 0
+            self.cycle_index[longest] = 0
+            self.cycle_len[longest] = 0
+
+        q_min = np.where(self.valid, q, np.iinfo(np.int32).max).min(axis=1)
+        q_min[~self.valid.any(axis=1)] = 0
+        green = np.clip(q[self._rows, selected] * 5.0 + q_min * 2, self.min_g, self.max_g).astype(np.int32)
+        return has, selected, green
+
+
+class _FullIndex:
+    # JunctionIndex stand-in: J junctions with all four approaches
+    def __init__(self, J, A=len(GROUPS)):
+        self.valid = np.ones((J, A), dtype=bool)
+        self.shape = self.valid.shape
+
+
+def check_rule(calls=500, junctions=8, max_count=6, seed=0):
+    """Feed the same random counts to the scalar and vector rules.
+
+    Returns the list of (call, junction, scalar, vector) mismatches; each
+    junction gets its own scalar policy, so rotation state is compared too.
+    """
+    rng = np.random.default_rng(seed)
+    vec = VectorFairnessDensity(_FullIndex(junctions))
+    scalars = [ScalarFairnessDensity() for _ in range(junctions)]
+    obs = Observation()
+    bad = []
+    for c in range(calls):
+        # plenty of zeros, so the active set keeps changing
+        q = rng.integers(0, max_count + 1, size=vec.valid.shape).astype(np.int32)
+        q[rng.random(q.shape) < 0.4] = 0
+        # junctions whose green has not run out yet skip the call
+        due = rng.random(junctions) < 0.7
+        has, selected, green = vec.decide(q, due)
+        for j, pol in enumerate(scalars):
+            if not due[j]:
+                if has[j]:
+                    bad.append((c, j, "not due", GROUPS[selected[j]]))
+                continue
+            obs.counts = dict(zip(GROUPS, q[j].tolist()))
+            want = pol.decide(obs)
+            got = (GROUPS[selected[j]], int(green[j])) if has[j] else (None, 0)
+            if got != want:
+                bad.append((c, j, want, got))
+    return bad
+
+
+# ==========================================================
+# RUN
+# ==========================================================
+def multi_run(max_steps=MAX_STEPS, seed=None, out_dir=None, config=SUMO_CONFIG, label=None):
+    print("\nRunning multi-junction ADAPTIVE AI...")
+    launcher.start(config, seed=seed, label=label)
+
+    index = JunctionIndex(load_topology(net_file_of(config)))
+    index.install(yellow=YEL)
+    policy = VectorFairnessDensity(index)
+    sensor = SubscriptionSensor(edges=index.edges)
+    sensor.subscribe()
+    print(f"Controlling {len(index.tls_ids)} traffic lights, {len(index.edges)} approaches")
+
+    path = os.path.join(out_dir, MULTI_CSV) if out_dir else MULTI_CSV
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    log = RunLog(path, ["Step", "TLS", "Selected", "Vehicles", "GreenTime"],
+                 categories={"TLS": index.tls_ids})
+
+    J = len(index.tls_ids)
+    q = np.zeros(index.shape, dtype=np.int32)
+    cur = np.full(J, -1, dtype=np.intp)          # approach holding the signal, -1 = none yet
+    pending = np.zeros(J, dtype=bool)            # in yellow, green decided
+    pending_sel = np.zeros(J, dtype=np.intp)
+    pending_green = np.zeros(J, dtype=np.int32)
+    next_switch = np.zeros(J, dtype=np.int64)    # end of the running green / yellow
+    tls_codes = np.arange(J, dtype=np.int16)
+    step = 0
+
+    try:
+        while step < max_steps and sensor.min_expected > 0:
+            sensor.step()
+            index.counts(sensor, out=q)
+
+            # yellow over: start the decided green
+            for j in np.flatnonzero(pending & (step >= next_switch)):
+                tls = index.tls_ids[j]
+                traci.trafficlight.setPhase(tls, int(2 * pending_sel[j]))
+                traci.trafficlight.setPhaseDuration(tls, int(pending_green[j]))
+                cur[j] = pending_sel[j]
+                next_switch[j] = step + pending_green[j]
+                pending[j] = False
+
+            # only junctions whose green ran out decide (and advance their rotation)
+            due = ~pending & (step >= next_switch)
+            has, selected, green = policy.decide(q, due)
+            for j in np.flatnonzero(has):
+                tls = index.tls_ids[j]
+                if selected[j] == cur[j]:
+                    # extend the running green
+                    traci.trafficlight.setPhaseDuration(tls, int(green[j]))
+                    next_switch[j] = step + green[j]
+                elif cur[j] < 0:
+                    traci.trafficlight.setPhase(tls, int(2 * selected[j]))
+                    traci.trafficlight.setPhaseDuration(tls, int(green[j]))
+                    cur[j] = selected[j]
+                    next_switch[j] = step + green[j]
+                else:
+                    traci.trafficlight.setPhase(tls, int(2 * cur[j] + 1))
+                    traci.trafficlight.setPhaseDuration(tls, YEL)
+                    pending[j] = True
+                    pending_sel[j] = selected[j]
+                    pending_green[j] = green[j]
+                    next_switch[j] = step + YEL
+
+            # one row per decision
+            rows = np.flatnonzero(has)
+            if len(rows):
+                log.extend([
+                    np.full(len(rows), step), tls_codes[rows], selected[rows],
+                    q[rows].sum(axis=1), green[rows],
+                ])
+            step += 1
+    finally:
+        log.close()
+        traci.close()
+
+    print(f"Multi-junction run complete (throughput: {sensor.arrived} vehicles arrived)")
+    return {"steps": step, "throughput": sensor.arrived}
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Fairness + density control of every TLS")
+    parser.add_argument("--check-rule", action="store_true",
+                        help="compare the vector rule with policies.FairnessDensity and exit")
+    args = launcher.parse_args(parser=parser)
+    if args.check_rule:
+        bad = check_rule()
+        for m in bad[:10]:
+            print("call %d, junction %d: scalar %s, vector %s" % m)
+        print("vector rule matches policies.FairnessDensity" if not bad
+              else f"{len(bad)} mismatches")
+        sys.exit(1 if bad else 0)
+    multi_run(seed=args.seed)
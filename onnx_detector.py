@@ -0,0 +1,238 @@
+# onnx_detector.py
+# CPU detector backend: exported (optionally INT8) YOLOv8 on ONNX Runtime,
+# fed with per-approach crops of the GUI frame.
+#
+#  - OnnxDetector     ONNX Runtime session (CPU, or OpenVINO through its
+#                     execution provider). Frames are letterboxed down to
+#                     `input_size`; only the vehicle class scores are read
+#                     from the raw output, then a small NumPy NMS.
+#  - RoiCameraSet     one GUI view cut into per-approach regions of interest
+#                     (bounding boxes of the incoming edges from topology.py,
+#                     mapped to pixels via the view boundary), so each
+#                     approach gets its own count from a single screenshot.
+#  - export_model     yolov8n.pt -> .onnx (and _int8.onnx) for this backend.
+#
+#   python onnx_detector.py --export --int8         # writes yolov8n_int8.onnx
+#   python onnx_detector.py --bench yolov8n_int8.onnx
+
+import os
+
+import numpy as np
+
+from backend import traci
+
+MODEL = "yolov8n.onnx"
+INPUT_SIZE = 320
+CONF = 0.35
+IOU = 0.45
+VEHICLE_CLASSES = (2, 3, 5, 7)   # COCO car, motorcycle, bus, truck
+ROI_MARGIN = 3.0                 # metres around an approach's lanes
+
+
+def _resize(img, w, h):
+    try:
+        import cv2
+        return cv2.resize(img, (w, h), interpolation=cv2.INTER_AREA)
+    except ImportError:
+        ys = (np.arange(h) * (img.shape[0] / h)).astype(np.intp)
+        xs = (np.arange(w) * (img.shape[1] / w)).astype(np.intp)
+        return img[ys[:, None], xs]
+
+
+def letterbox(img, size):
+    """BGR HxWx3 -> RGB float32 3xSxS in [0, 1], aspect kept, grey padded."""
+    h, w = img.shape[:2]
+    r = size / max(h, w)
+    nw, nh = max(1, int(round(w * r))), max(1, int(round(h * r)))
+    out = np.full((size, size, 3), 114, dtype=np.uint8)
+    top, left = (size - nh) // 2, (size - nw) // 2
+    out[top:top + nh, left:left + nw] = _resize(img, nw, nh)
+    return out[..., ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+
+
+def nms(boxes, scores, iou):
+    """Greedy NMS on xyxy boxes; returns kept indices."""
+    order = scores.argsort()[::-1]
+    area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while len(order):
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        xx1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        order = rest[inter / (area[i] + area[rest] - inter + 1e-9) <= iou]
+    return keep
+
+
+class OnnxDetector:
+    """count_batch(frames) -> [vehicles per frame] with an exported YOLOv8."""
+
+    def __init__(self, model=MODEL, input_size=INPUT_SIZE, conf=CONF, iou=IOU,
+                 classes=VEHICLE_CLASSES, providers=None, threads=None):
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+        available = ort.get_available_providers()
+        if providers is None:
+            providers = [p for p in ("OpenVINOExecutionProvider", "CPUExecutionProvider") if p in available]
+        self.session = ort.InferenceSession(model, opts, providers=providers)
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        # exported with a fixed size/batch: follow the model
+        fixed = [d for d in inp.shape[2:] if isinstance(d, int)]
+        self.input_size = fixed[0] if fixed else input_size
+        self.dynamic_batch = not isinstance(inp.shape[0], int)
+        self.conf, self.iou = conf, iou
+        self.class_rows = np.array(classes) + 4   # rows of the class scores in the output
+
+    def _run(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+    def _count(self, pred):
+        # pred: (4 + classes, anchors); keep vehicle class scores only
+        if pred.shape[0] > pred.shape[1]:
+            pred = pred.T
+        scores = pred[self.class_rows].max(axis=0)
+        m = scores > self.conf
+        if not m.any():
+            return 0
+        cx, cy, w, h = pred[:4, m]
+        boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+        return len(nms(boxes, scores[m], self.iou))
+
+    def count_batch(self, frames):
+        if not len(frames):
+            return []
+        x = np.stack([letterbox(f, self.input_size) for f in frames])
+        if self.dynamic_batch:
+            out = self._run(x)
+        else:
+            out = np.concatenate([self._run(x[i:i + 1]) for i in range(len(x))])
+        return [self._count(p) for p in out]
+
+    def __call__(self, frame):
+        return self.count_batch([frame])[0]
+
+
+# ==========================================================
+# PER-APPROACH REGIONS OF INTEREST
+# ==========================================================
+def approach_rois(topo, approach_edges, boundary, frame_shape, margin=ROI_MARGIN):
+    """{approach: (y0, y1, x0, x1)} pixel boxes of each approach's lanes.
+
+    boundary is traci.gui.getBoundary(view): ((xmin, ymin), (xmax, ymax))
+    in network coordinates for the whole frame.
+    """
+    (bx0, by0), (bx1, by1) = boundary
+    h, w = frame_shape[:2]
+    sx, sy = w / max(bx1 - bx0, 1e-9), h / max(by1 - by0, 1e-9)
+    rois = {}
+    for name, edge in approach_edges.items():
+        bbox = topo.edges.get(edge, {}).get("bbox")
+        if bbox is None:
+            continue
+        x0, y0, x1, y1 = bbox
+        px0 = int(np.clip((x0 - margin - bx0) * sx, 0, w))
+        px1 = int(np.clip((x1 + margin - bx0) * sx, 0, w))
+        py0 = int(np.clip((by1 - (y1 + margin)) * sy, 0, h))   # screen y grows downwards
+        py1 = int(np.clip((by1 - (y0 - margin)) * sy, 0, h))
+        if px1 > px0 and py1 > py0:
+            rois[name] = (py0, py1, px0, px1)
+    return rois
+
+
+class RoiCameraSet:
+    """One frame source split into per-approach crops (CameraSet protocol).
+
+    The view boundary is read when a frame is requested, so panning or
+    zooming the GUI keeps the crops on the right lanes. Crops are copied
+    out of the source's reused frame buffer: at one frame per step the
+    buffer can come round again while the detector still holds a crop.
+    """
+
+    def __init__(self, source, view_id, topo, approach_edges, margin=ROI_MARGIN):
+        self.source = source
+        self.view_id = view_id
+        self.topo = topo
+        self.approach_edges = dict(approach_edges)
+        self.margin = margin
+        self._boundary = None
+
+    def keys(self):
+        return list(self.approach_edges)
+
+    def request(self, step):
+        try:
+            self._boundary = traci.gui.getBoundary(self.view_id)
+        except Exception:
+            self._boundary = None
+        self.source.request(step)
+
+    def after_step(self):
+        r = self.source.after_step()
+        if r is None or self._boundary is None:
+            return []
+        step, frame = r
+        rois = approach_rois(self.topo, self.approach_edges, self._boundary, frame.shape, self.margin)
+        return [(name, step, frame[y0:y1, x0:x1].copy()) for name, (y0, y1, x0, x1) in rois.items()]
+
+    def snapshot(self, path):
+        self.source.snapshot(path)
+
+    def close(self):
+        self.source.close()
+
+
+# ==========================================================
+# EXPORT
+# ==========================================================
+def export_model(weights="yolov8n.pt", imgsz=INPUT_SIZE, int8=False):
+    """Export YOLOv8 weights to ONNX (dynamic batch); optionally INT8 weights."""
+    from ultralytics import YOLO
+
+    path = YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    if not int8:
+        return path
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    q_path = os.path.splitext(path)[0] + "_int8.onnx"
+    quantize_dynamic(path, q_path, weight_type=QuantType.QUInt8)
+    return q_path
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    p = argparse.ArgumentParser(description="Export / benchmark the ONNX detector backend")
+    p.add_argument("model", nargs="?", default=MODEL)
+    p.add_argument("--export", action="store_true", help="export yolov8n.pt first")
+    p.add_argument("--int8", action="store_true", help="with --export: INT8-quantize")
+    p.add_argument("--size", type=int, default=INPUT_SIZE)
+    p.add_argument("--bench", type=int, default=50, metavar="N", help="time N batches of 4 crops")
+    args = p.parse_args()
+
+    model = args.model
+    if args.export:
+        model = export_model(imgsz=args.size, int8=args.int8)
+        print("Exported:", model)
+
+    from frames import SyntheticFrameSource
+
+    det = OnnxDetector(model, args.size)
+    src = SyntheticFrameSource()
+    frame = src.render()
+    h, w = frame.shape[:2]
+    crops = [frame[:h // 2, :w // 2], frame[:h // 2, w // 2:], frame[h // 2:, :w // 2], frame[h // 2:, w // 2:]]
+    det.count_batch(crops)   # warm-up
+    t0 = time.perf_counter()
+    for _ in range(args.bench):
+        det.count_batch(crops)
+    dt = (time.perf_counter() - t0) / args.bench
+    print(f"{model}: {1000 * dt:.1f} ms per 4-crop batch ({args.size}px input)")
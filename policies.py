@@ -0,0 +1,204 @@
+# policies.py
+# Signal control policies behind one interface, selectable by name.
+#
+# A policy sees an Observation at every decision point (end of the current
+# green, or when nothing has been served yet) and returns
+# (group, duration): the approach to give green to and for how many steps.
+# Returning the current group extends its green without a yellow;
+# returning (None, 0) means "nothing to serve yet, ask again next step".
+#
+# Policies hold no TraCI state, so the same objects drive the SUMO loop
+# (adaptive_compare.run_policy) and the synthetic benchmark simulator.
+#
+#   fixed_time        15 s green per approach in turn (the baseline)
+#   fairness_density  the adaptive rule from adaptive_run
+#   max_pressure      serve the approach with the highest queue pressure
+#   actuated          gap-based: extend green while vehicles keep coming
+
+GROUPS = ["north", "east", "south", "west"]
+
+MIN_G, MAX_G = 12, 45
+
+POLICIES = {}
+
+
+def register(name):
+    """Class decorator: make a policy available under `name`."""
+    def deco(cls):
+        cls.name = name
+        POLICIES[name] = cls
+        return cls
+    return deco
+
+
+def make_policy(name, **kwargs):
+    try:
+        cls = POLICIES[name]
+    except KeyError:
+        raise ValueError(f"unknown policy {name!r}, expected one of {sorted(POLICIES)}")
+    return cls(**kwargs)
+
+
+class Observation:
+    """What a policy sees at a decision point.
+
+    counts      {group: vehicles on the approach edge}
+    queues      {group: halting vehicles on the approach edge}
+    out_counts  {group: vehicles on the group's outgoing edge}
+    current     group currently green (None before the first green)
+    elapsed     steps since the current green started
+    yolo        {camera: detector count} (may be empty)
+    """
+
+    __slots__ = ("step", "counts", "queues", "out_counts", "current", "elapsed", "yolo")
+
+    def __init__(self, step=0, counts=None, queues=None, out_counts=None,
+                 current=None, elapsed=0, yolo=None):
+        self.step = step
+        self.counts = counts or {}
+        self.queues = queues or {}
+        self.out_counts = out_counts or {}
+        self.current = current
+        self.elapsed = elapsed
+        self.yolo = yolo or {}
+
+
+class Policy:
+    name = None
+
+    def reset(self):
+        pass
+
+    def decide(self, obs):
+        raise NotImplementedError
+
+
+# ==========================================================
+# FIXED TIME (baseline)
+# ==========================================================
+@register("fixed_time")
+class FixedTime(Policy):
+    def __init__(self, green=15, order=GROUPS):
+        self.green = green
+        self.order = list(order)
+        self.reset()
+
+    def reset(self):
+        self._i = 0
+
+    def decide(self, obs):
+        group = self.order[self._i % len(self.order)]
+        self._i += 1
+        return group, self.green
+
+
+# ==========================================================
+# FAIRNESS + DENSITY (adaptive AI)
+# ==========================================================
+@register("fairness_density")
+class FairnessDensity(Policy):
+    def __init__(self, min_g=MIN_G, max_g=MAX_G):
+        self.min_g, self.max_g = min_g, max_g
+        self.reset()
+
+    def reset(self):
+        self.cycle_list = []
+        self.cycle_index = 0
+        self.rotation_count = 0
+        self.active = []
+
+    def decide(self, obs):
+        q = obs.counts
+
+        # active lanes only
+        active = self.active = [g for g in GROUPS if q[g] > 0]
+        if not active:
+            return None, 0
+
+        # fairness cycle
+        if self.rotation_count < len(active):
+
+            if not self.cycle_list:
+                self.cycle_list = sorted(active, key=lambda g: q[g], reverse=True)
+                self.cycle_index = 0
+
+            selected = self.cycle_list[self.cycle_index % len(self.cycle_list)]
+            self.cycle_index += 1
+            self.rotation_count += 1
+
+        else:
+            selected = max(active, key=lambda g: q[g])
+            self.rotation_count = 0
+            self.cycle_index = 0
+            self.cycle_list = []
+
+        # green time calculation
+        base_time = q[selected] * 5.0
+        fairness = min(q.values()) * 2
+        green = int(max(self.min_g, min(self.max_g, base_time + fairness)))
+        return selected, green
+
+
+# ==========================================================
+# MAX PRESSURE
+# ==========================================================
+@register("max_pressure")
+class MaxPressure(Policy):
+    """Serve the approach with the largest queue minus downstream load.
+
+    An approach's vehicles leave on the other three approaches' outgoing
+    edges, so its pressure is queue - mean(out counts of the others).
+    Only approaches with halting vehicles are candidates (any vehicles,
+    when none are halting).
+    Re-evaluated every `interval` steps; keeping the same approach just
+    extends its green.
+    """
+
+    def __init__(self, interval=MIN_G):
+        self.interval = interval
+
+    def decide(self, obs):
+        # halting vehicles; moving-only traffic still needs a green
+        queues = obs.queues
+        demand = [g for g in GROUPS if queues.get(g, 0) > 0]
+        if not demand:
+            queues = obs.counts
+            demand = [g for g in GROUPS if queues.get(g, 0) > 0]
+        if not demand:
+            return None, 0
+        out = obs.out_counts
+
+        def pressure(g):
+            down = [out.get(o, 0) for o in GROUPS if o != g]
+            return queues.get(g, 0) - sum(down) / len(down)
+
+        return max(demand, key=pressure), self.interval
+
+
+# ==========================================================
+# GAP-BASED ACTUATED
+# ==========================================================
+@register("actuated")
+class Actuated(Policy):
+    """Minimum green, then extend while the approach still has vehicles.
+
+    A gap (no vehicle left on the green approach) or reaching max_g ends
+    the green; the next approach in turn with demand is served.
+    """
+
+    def __init__(self, min_g=MIN_G, max_g=MAX_G, extension=3):
+        self.min_g, self.max_g = min_g, max_g
+        self.extension = extension
+
+    def decide(self, obs):
+        q = obs.counts
+        cur = obs.current
+        if cur is not None and q.get(cur, 0) > 0 and obs.elapsed + self.extension <= self.max_g:
+            return cur, self.extension
+
+        start = GROUPS.index(cur) + 1 if cur in GROUPS else 0
+        for k in range(len(GROUPS)):
+            g = GROUPS[(start + k) % len(GROUPS)]
+            if q.get(g, 0) > 0:
+                return g, self.min_g
+        return None, 0
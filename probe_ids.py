@@ -1,9 +1,10 @@
-import traci
-SUMO_BINARY = "sumo-gui"
+import launcher
+from backend import traci
 SUMO_CONFIG = "simulation.sumocfg"
 
-# start SUMO (GUI) and connect
-traci.start([SUMO_BINARY, "-c", SUMO_CONFIG, "--start"])
+# start SUMO (GUI, or headless with --mode sumo) and connect
+args = launcher.parse_args(description="Print TLS / edge / lane ids")
+launcher.start(SUMO_CONFIG, seed=args.seed)
 print("SUMO started")
 
 # print lists
@@ -0,0 +1,190 @@
+# profiling.py
+# Low-overhead per-stage timers for the control loop, plus an optional
+# cProfile / pyinstrument capture of a bounded window of steps.
+#
+#   timer = StageTimer(enabled=True)
+#   t = timer.tic()
+#   sensor.step()
+#   t = timer.lap("sim_step", t)
+#   ...
+#   timer.end_step()                  # closes the per-step total
+#   timer.save("performance_ai.timings.json")
+#
+# Disabled timers cost one function call per lap. Durations go into
+# growable float64 arrays; the sidecar JSON holds count/mean/p50/p95/p99/
+# max per stage and per step, and a log-spaced histogram for plotting.
+
+import json
+import os
+import time
+
+import numpy as np
+
+TIMINGS_EXT = ".timings.json"
+HIST_BINS_US = np.logspace(0, 6, 25)   # 1 us .. 1 s
+
+
+def timings_path(path):
+    """Sidecar file that pairs with a run log path."""
+    return os.path.splitext(path)[0] + TIMINGS_EXT
+
+
+class _Samples:
+    __slots__ = ("data", "n")
+
+    def __init__(self, capacity=4096):
+        self.data = np.empty(capacity, dtype=np.float64)
+        self.n = 0
+
+    def add(self, v):
+        if self.n == len(self.data):
+            self.data = np.concatenate([self.data, np.empty_like(self.data)])
+        self.data[self.n] = v
+        self.n += 1
+
+    def values(self):
+        return self.data[:self.n]
+
+
+def summarize(values):
+    if len(values) == 0:
+        return {"count": 0}
+    us = values * 1e6
+    p50, p95, p99 = np.percentile(us, [50, 95, 99])
+    hist, _ = np.histogram(us, bins=HIST_BINS_US)
+    return {
+        "count": int(len(us)),
+        "total_s": round(float(values.sum()), 6),
+        "mean_us": round(float(us.mean()), 2),
+        "p50_us": round(float(p50), 2),
+        "p95_us": round(float(p95), 2),
+        "p99_us": round(float(p99), 2),
+        "max_us": round(float(us.max()), 2),
+        "hist": hist.tolist(),
+    }
+
+
+class StageTimer:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stages = {}
+        self._step = _Samples()
+        self._step_t0 = None
+
+    def tic(self):
+        if not self.enabled:
+            return 0.0
+        t = time.perf_counter()
+        if self._step_t0 is None:
+            self._step_t0 = t
+        return t
+
+    def lap(self, stage, t0):
+        """Record time since t0 under `stage`; returns the new t0."""
+        if not self.enabled:
+            return 0.0
+        t = time.perf_counter()
+        s = self.stages.get(stage)
+        if s is None:
+            s = self.stages[stage] = _Samples()
+        s.add(t - t0)
+        return t
+
+    def end_step(self):
+        if not self.enabled or self._step_t0 is None:
+            return
+        self._step.add(time.perf_counter() - self._step_t0)
+        self._step_t0 = None
+
+    def report(self):
+        return {
+            "stages": {k: summarize(s.values()) for k, s in self.stages.items()},
+            "step": summarize(self._step.values()),
+            "hist_bins_us": HIST_BINS_US.round(2).tolist(),
+        }
+
+    def save(self, path):
+        if not self.enabled:
+            return None
+        path = timings_path(path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=1)
+        return path
+
+    def print_table(self):
+        if not self.enabled:
+            return
+        rep = self.report()
+        print(f"{'stage':<14}{'count':>8}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'total s':>10}")
+        for name, r in list(rep["stages"].items()) + [("step", rep["step"])]:
+            if r["count"]:
+                print(f"{name:<14}{r['count']:>8}{r['p50_us']:>10}{r['p95_us']:>10}"
+                      f"{r['p99_us']:>10}{r['total_s']:>10}")
+
+
+def load_timings(path):
+    """Read a timings sidecar (given the run log or the sidecar path)."""
+    p = path if path.endswith(TIMINGS_EXT) else timings_path(path)
+    if not os.path.exists(p):
+        return None
+    with open(p, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ==========================================================
+# PROFILER WINDOW
+# ==========================================================
+class ProfileWindow:
+    """Run cProfile or pyinstrument for steps [start, start + steps).
+
+    Output: <out>.prof (cProfile, open with snakeviz/pstats) or
+    <out>.html (pyinstrument).
+    """
+
+    def __init__(self, start, steps, out, profiler="cprofile"):
+        self.start = start
+        self.stop_at = start + steps
+        self.out = os.path.splitext(out)[0]
+        self.profiler = profiler
+        self._prof = None
+        self.done = False
+
+    def update(self, step):
+        if self.done:
+            return
+        if self._prof is None and step >= self.start:
+            self._begin()
+        elif self._prof is not None and step >= self.stop_at:
+            self.finish()
+
+    def _begin(self):
+        if self.profiler == "pyinstrument":
+            from pyinstrument import Profiler
+            self._prof = Profiler()
+            self._prof.start()
+        else:
+            import cProfile
+            self._prof = cProfile.Profile()
+            self._prof.enable()
+
+    def finish(self):
+        if self._prof is None or self.done:
+            return None
+        self.done = True
+        if self.profiler == "pyinstrument":
+            self._prof.stop()
+            path = self.out + ".html"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self._prof.output_html())
+        else:
+            self._prof.disable()
+            path = self.out + ".prof"
+            self._prof.dump_stats(path)
+        print("Profile written:", path)
+        return path
+
+
+def parse_window(text):
+    """'START:STEPS' -> (start, steps)."""
+    start, _, steps = text.partition(":")
+    return int(start), int(steps or 100)
@@ -0,0 +1,164 @@
+# queue_sim.py
+# Deterministic stand-in for the SUMO junction, for benchmarks.
+#
+# Four approaches (north, east, south, west) feed one signal:
+#  - vehicles arrive per approach as a Poisson process (seeded, pre-drawn)
+#  - they drive `travel` steps down the approach edge, then join its queue
+#  - the green approach discharges at the saturation flow after a short
+#    start-up lost time; yellow and red discharge nothing
+#  - discharged vehicles go straight on and occupy the opposite outgoing
+#    edge for `travel` steps (what max_pressure sees as downstream load)
+#
+# The signal is driven exactly like adaptive_compare.run_policy drives the
+# TLS: a Policy is asked at the end of each green, returning the same group
+# extends it, another group goes through YELLOW steps first. No SUMO, no
+# GUI, so a run takes milliseconds.
+#
+#   sim = QueueSim(rates={"north": 0.1, ...}, seed=1)
+#   kpis = sim.run(make_policy("fairness_density"), steps=3600)
+
+import time
+
+import numpy as np
+
+from policies import GROUPS, Observation
+
+SAT_FLOW = 1.0        # veh/s per approach (2 lanes x 1800 veh/h)
+LOST_TIME = 2         # start-up lost steps at the beginning of each green
+YELLOW = 3
+TRAVEL = 10           # steps from entering an edge to its stop line / exit
+STEPS = 3600
+
+OPPOSITE = {"north": "south", "south": "north", "east": "west", "west": "east"}
+
+# per-approach capacity of the fixed_time baseline (15 s green + 3 s yellow
+# per approach, LOST_TIME lost per green); demand levels are relative to it
+REF_CAPACITY = SAT_FLOW * (15 - LOST_TIME) / (4 * (15 + YELLOW))
+DEMAND_LEVELS = {"light": 0.3, "moderate": 0.6, "heavy": 0.9, "oversaturated": 1.2}
+DEMAND_SPLIT = {"north": 1.3, "east": 0.7, "south": 1.2, "west": 0.8}
+
+
+def demand_rates(level, split=DEMAND_SPLIT):
+    """Arrival rates (veh/s) per approach for a named demand level or a ratio."""
+    x = DEMAND_LEVELS[level] if isinstance(level, str) else float(level)
+    return {g: x * REF_CAPACITY * split[g] for g in GROUPS}
+
+
+class QueueSim:
+    def __init__(self, rates, seed=0, sat_flow=SAT_FLOW, lost_time=LOST_TIME,
+                 yellow=YELLOW, travel=TRAVEL):
+        self.rates = np.array([rates[g] for g in GROUPS], dtype=np.float64)
+        self.seed = seed
+        self.sat_flow = sat_flow
+        self.lost_time = lost_time
+        self.yellow = yellow
+        self.travel = travel
+
+    def arrivals(self, steps):
+        """(steps, 4) vehicles entering each approach edge per step."""
+        rng = np.random.default_rng(self.seed)
+        return rng.poisson(self.rates, size=(steps, len(GROUPS))).astype(np.int64)
+
+    def run(self, policy, steps=STEPS):
+        """Simulate `steps` seconds under `policy`; returns a KPI dict."""
+        policy.reset()
+        n = len(GROUPS)
+        arr = self.arrivals(steps).tolist()
+        deps = [[0] * n for _ in range(steps)]
+        opp = [GROUPS.index(OPPOSITE[g]) for g in GROUPS]
+
+        transit = [0] * n          # vehicles driving down each approach
+        queue = [0] * n            # vehicles waiting at the stop line
+        out = [0] * n              # vehicles on each outgoing edge
+        credit = 0.0               # fractional saturation-flow discharge
+
+        cur = None                 # index of the green approach
+        pending = None             # (index, green) after the yellow
+        phase_end = green_start = 0
+        green = 0
+        obs = Observation()
+
+        decisions = 0
+        decide_s = 0.0
+        queue_s = 0                # vehicle-steps spent queued (delay)
+        joined = departed = 0
+        max_queue = 0
+        greens = []
+
+        for step in range(steps):
+            a = arr[step]
+            old = arr[step - self.travel] if step >= self.travel else None
+            for i in range(n):
+                transit[i] += a[i]
+                if old is not None:
+                    transit[i] -= old[i]
+                    queue[i] += old[i]
+                    joined += old[i]
+            if step >= self.travel:
+                gone = deps[step - self.travel]
+                for i in range(n):
+                    out[opp[i]] -= gone[i]
+
+            # signal logic, same phase machine as run_policy
+            if pending is not None and step >= phase_end:
+                cur, green = pending
+                pending = None
+                phase_end = step + green
+                green_start = step
+                credit = 0.0
+            elif step >= phase_end:
+                obs.step = step
+                obs.counts = {g: transit[i] + queue[i] for i, g in enumerate(GROUPS)}
+                obs.queues = {g: queue[i] for i, g in enumerate(GROUPS)}
+                obs.out_counts = {g: out[i] for i, g in enumerate(GROUPS)}
+                obs.current = GROUPS[cur] if cur is not None else None
+                obs.elapsed = step - green_start
+                t0 = time.perf_counter()
+                selected, dur = policy.decide(obs)
+                decide_s += time.perf_counter() - t0
+                decisions += 1
+
+                if selected is not None:
+                    sel = GROUPS.index(selected)
+                    greens.append(dur)
+                    if sel == cur:
+                        phase_end = step + dur
+                        green = dur
+                    elif cur is None:
+                        cur, green = sel, dur
+                        phase_end = step + green
+                        green_start = step
+                        credit = 0.0
+                    else:
+                        pending = (sel, dur)
+                        phase_end = step + self.yellow
+
+            # discharge the green approach
+            if cur is not None and pending is None and step - green_start >= self.lost_time:
+                credit += self.sat_flow
+                d = min(queue[cur], int(credit))
+                credit -= int(credit)
+                if d:
+                    queue[cur] -= d
+                    deps[step][cur] = d
+                    out[opp[cur]] += d
+                    departed += d
+
+            total_q = sum(queue)
+            queue_s += total_q
+            if total_q > max_queue:
+                max_queue = total_q
+
+        return {
+            "steps": steps,
+            "decisions": decisions,
+            "decide_s": decide_s,
+            "arrived": joined,
+            "throughput": departed,
+            "throughput_vph": round(3600.0 * departed / steps, 1),
+            "avg_delay_s": round(queue_s / joined, 2) if joined else 0.0,
+            "avg_queue": round(queue_s / steps, 2),
+            "max_queue": max_queue,
+            "residual_queue": sum(queue),
+            "avg_green": round(sum(greens) / len(greens), 2) if greens else 0.0,
+        }
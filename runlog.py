@@ -0,0 +1,140 @@
+# runlog.py
+# Columnar, typed run log written directly by the simulation loops.
+# Each column is a NumPy array saved into one .npz next to the CSV
+# (performance_ai.csv -> performance_ai.npz). Integer columns are int32,
+# categorical columns are stored as int16 codes plus their label list.
+# Loading it is a handful of array reads instead of a CSV parse.
+
+import os
+import numpy as np
+
+RUNLOG_EXT = ".npz"
+CAPACITY = 4096           # initial rows; arrays double when full
+CAT_PREFIX = "__cat__"    # key prefix for categorical label arrays
+
+GROUPS = ["north", "east", "south", "west"]
+
+
+def runlog_path(path):
+    """Return the .npz path that pairs with a CSV path (or stem)."""
+    return os.path.splitext(path)[0] + RUNLOG_EXT
+
+
+class RunLog:
+    """Append rows into preallocated typed columns, save on close."""
+
+    def __init__(self, path, columns, categories=None, capacity=CAPACITY):
+        self.path = runlog_path(path)
+        self.columns = list(columns)
+        self.categories = dict(categories or {})
+        self._codes = {
+            c: {label: i for i, label in enumerate(labels)}
+            for c, labels in self.categories.items()
+        }
+        self._data = {
+            c: np.zeros(capacity, dtype=np.int16 if c in self.categories else np.int32)
+            for c in self.columns
+        }
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def _grow(self):
+        for c, arr in self._data.items():
+            new = np.zeros(len(arr) * 2, dtype=arr.dtype)
+            new[:self._n] = arr[:self._n]
+            self._data[c] = new
+
+    def append(self, row):
+        if self._n == len(self._data[self.columns[0]]):
+            self._grow()
+        i = self._n
+        for c, v in zip(self.columns, row):
+            if c in self._codes:
+                v = self._codes[c].get(v, -1)
+            self._data[c][i] = v
+        self._n += 1
+
+    def append_coded(self, row):
+        """Append one row whose categorical columns already hold int codes."""
+        if self._n == len(self._data[self.columns[0]]):
+            self._grow()
+        i = self._n
+        for c, v in zip(self.columns, row):
+            self._data[c][i] = v
+        self._n += 1
+
+    def extend(self, arrays):
+        """Append many rows at once from equal-length column arrays.
+
+        Categorical columns take their int codes here, not labels.
+        """
+        n = len(arrays[0])
+        while self._n + n > len(self._data[self.columns[0]]):
+            self._grow()
+        for c, v in zip(self.columns, arrays):
+            self._data[c][self._n:self._n + n] = v
+        self._n += n
+
+    def save(self):
+        arrays = {c: arr[:self._n] for c, arr in self._data.items()}
+        for c, labels in self.categories.items():
+            arrays[CAT_PREFIX + c] = np.array(labels)
+        # write to a temp file and swap in, so readers never see a partial file
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, self.path)
+
+    def close(self):
+        self.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+# ==========================================================
+# READERS
+# ==========================================================
+def read_runlog(path):
+    import pandas as pd   # readers only; the writer needs NumPy alone
+
+    with np.load(runlog_path(path), allow_pickle=False) as z:
+        keys = [k for k in z.files if not k.startswith(CAT_PREFIX)]
+        cols = {}
+        for k in keys:
+            if CAT_PREFIX + k in z.files:
+                labels = [str(x) for x in z[CAT_PREFIX + k]]
+                cols[k] = pd.Categorical.from_codes(z[k].astype(np.int16), categories=labels)
+            else:
+                cols[k] = z[k]
+    return pd.DataFrame(cols)
+
+
+def load_run(path):
+    """Load a per-step run log, preferring the .npz over the CSV.
+
+    The CSV is used when no .npz exists or when the CSV is newer
+    (e.g. written by another tool after the last simulation run).
+    """
+    import pandas as pd
+
+    npz = runlog_path(path)
+    csv_path = os.path.splitext(path)[0] + ".csv"
+    if os.path.exists(npz):
+        if not os.path.exists(csv_path) or os.path.getmtime(npz) >= os.path.getmtime(csv_path):
+            return read_runlog(npz)
+    return pd.read_csv(csv_path)
+
+
+def export_csv(path, csv_path=None):
+    """Write a .npz run log back out as CSV."""
+    df = read_runlog(path)
+    csv_path = csv_path or os.path.splitext(path)[0] + ".csv"
+    df.to_csv(csv_path, index=False, encoding="utf-8")
+    return csv_path
@@ -0,0 +1,84 @@
+# sensing.py
+# Subscription-based sensing for the control loops.
+# Instead of one TraCI round trip per edge/lane per step, every value we
+# need is subscribed once; SUMO then ships all results back inside the
+# simulationStep() reply, so a step costs a single socket exchange.
+
+from backend import traci, constants as tc
+
+
+class SubscriptionSensor:
+    """Per-step edge/lane vehicle and halting counts plus departed/arrived totals.
+
+    Call subscribe() once after traci.start(), then update() after
+    every traci.simulationStep().
+    """
+
+    def __init__(self, edges=(), lanes=()):
+        self.edges = list(dict.fromkeys(edges))
+        self.lanes = list(dict.fromkeys(lanes))
+        self.edge_counts = {e: 0 for e in self.edges}
+        self.edge_halting = {e: 0 for e in self.edges}
+        self.lane_counts = {ln: 0 for ln in self.lanes}
+        self.departed = 0         # vehicles inserted so far
+        self.arrived = 0          # vehicles that completed their route (throughput)
+        self.exact_flow = True    # False once advance() skipped steps: totals undercount
+        self.min_expected = 0     # vehicles running + still to be inserted
+        self.time = 0.0           # simulation time (s)
+        self.delta_t = 1.0        # simulation step length (s)
+
+    def subscribe(self):
+        for e in self.edges:
+            traci.edge.subscribe(e, [tc.LAST_STEP_VEHICLE_NUMBER,
+                                     tc.LAST_STEP_VEHICLE_HALTING_NUMBER])
+        for ln in self.lanes:
+            traci.lane.subscribe(ln, [tc.LAST_STEP_VEHICLE_NUMBER])
+        traci.simulation.subscribe([
+            tc.VAR_DEPARTED_VEHICLES_IDS,
+            tc.VAR_ARRIVED_VEHICLES_IDS,
+            tc.VAR_MIN_EXPECTED_VEHICLES,
+            tc.VAR_TIME,
+        ])
+        # subscription results only arrive with the next step
+        self.min_expected = traci.simulation.getMinExpectedNumber()
+        self.time = traci.simulation.getTime()
+        self.delta_t = traci.simulation.getDeltaT()
+
+    def update(self):
+        # all of these read the cached step reply; no extra round trips
+        if self.edges:
+            res = traci.edge.getAllSubscriptionResults()
+            for e in self.edges:
+                r = res.get(e, {})
+                self.edge_counts[e] = r.get(tc.LAST_STEP_VEHICLE_NUMBER, 0)
+                self.edge_halting[e] = r.get(tc.LAST_STEP_VEHICLE_HALTING_NUMBER, 0)
+        if self.lanes:
+            res = traci.lane.getAllSubscriptionResults()
+            for ln in self.lanes:
+                self.lane_counts[ln] = res.get(ln, {}).get(tc.LAST_STEP_VEHICLE_NUMBER, 0)
+
+        sim = traci.simulation.getSubscriptionResults()
+        self.departed += len(sim.get(tc.VAR_DEPARTED_VEHICLES_IDS, ()))
+        self.arrived += len(sim.get(tc.VAR_ARRIVED_VEHICLES_IDS, ()))
+        self.min_expected = sim.get(tc.VAR_MIN_EXPECTED_VEHICLES, self.min_expected)
+        self.time = sim.get(tc.VAR_TIME, self.time + self.delta_t)
+
+    def step(self):
+        """Advance one simulation step and refresh all readings."""
+        traci.simulationStep()
+        self.update()
+
+    def advance(self, n):
+        """Advance n steps in one call (one socket exchange).
+
+        Readings reflect the last of those steps only: departures and
+        arrivals during the skipped steps are not seen, so `arrived` is a
+        lower bound when stepping in bulk (use SUMO's tripinfo output for
+        exact throughput).
+        """
+        if n <= 1:
+            self.step()
+            return
+        self.exact_flow = False
+        traci.simulationStep(self.time + n * self.delta_t)
+        self.update()
@@ -0,0 +1,192 @@
+# shm_ring.py
+# Fixed-size shared-memory ring buffer of per-step simulation state.
+#
+# One writer (the control loop) and any number of readers in other
+# processes (dashboard, recorder, analytics). Readers attach to the
+# segment by name and see it as NumPy arrays over the shared memory, so
+# attaching copies nothing and reading never touches the writer.
+#
+# Layout: a small int64 header followed by (capacity, len(FIELDS)) int32
+# records. The writer fills a slot, then bumps the sequence counter; a
+# reader reads the counter, copies the slots it wants, and re-reads the
+# counter to drop any slot the writer lapped meanwhile.
+#
+#   ring = StepRing.create("tsp_steps")            # writer
+#   ring.write([step, n, e, s, w, sel, green, ...])
+#
+#   ring = StepRing.attach("tsp_steps")            # reader
+#   ring.latest(100)                               # (<=100, F) int32 copy
+#
+#   python shm_ring.py tsp_steps --follow
+
+import os
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+
+FIELDS = [
+    "step", "north", "east", "south", "west",
+    "selected", "green", "yolo_total", "fused",
+    "yolo_north", "yolo_east", "yolo_south", "yolo_west",
+]
+GROUP_CODES = {"north": 0, "east": 1, "south": 2, "west": 3}   # selected; -1 = none
+CAPACITY = 4096
+MAGIC = 0x5453505247   # "TSPRG"
+
+_H_MAGIC, _H_CAP, _H_FIELDS, _H_SEQ, _H_PID = range(5)
+_HEADER = 8   # int64 slots
+
+
+def _attach_untracked(name):
+    # readers must not let the resource tracker unlink the writer's segment
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:   # Python < 3.13
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+def _pid_alive(pid):
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        # segments vanish with their last handle on Windows: an existing
+        # one always belongs to a running process
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _remove_stale(name):
+    """Unlink a segment left behind by a dead writer; refuse live/foreign ones."""
+    old = shared_memory.SharedMemory(name=name)
+    magic = pid = 0
+    if old.size >= _HEADER * 8:
+        header = np.ndarray((_HEADER,), dtype=np.int64, buffer=old.buf)
+        magic, pid = int(header[_H_MAGIC]), int(header[_H_PID])
+        del header      # release the buffer before close()
+    old.close()
+    if magic != MAGIC:
+        raise FileExistsError(f"shared memory {name!r} exists and is not a StepRing")
+    if _pid_alive(pid):
+        raise FileExistsError(f"StepRing {name!r} is in use by process {pid}; pick another name")
+    old.unlink()
+
+
+class StepRing:
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((_HEADER,), dtype=np.int64, buffer=shm.buf)
+        if self.header[_H_MAGIC] != MAGIC:
+            raise ValueError(f"shared memory {shm.name!r} is not a StepRing")
+        self.capacity = int(self.header[_H_CAP])
+        self.n_fields = int(self.header[_H_FIELDS])
+        self.data = np.ndarray((self.capacity, self.n_fields), dtype=np.int32,
+                               buffer=shm.buf, offset=_HEADER * 8)
+
+    @classmethod
+    def create(cls, name, capacity=CAPACITY, n_fields=len(FIELDS)):
+        size = _HEADER * 8 + capacity * n_fields * 4
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # left behind by a run that did not shut down cleanly?
+            _remove_stale(name)
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[_H_CAP] = capacity
+        header[_H_FIELDS] = n_fields
+        header[_H_PID] = os.getpid()
+        header[_H_MAGIC] = MAGIC
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(_attach_untracked(name), owner=False)
+
+    # ---------- writer ----------
+    def write(self, record):
+        seq = int(self.header[_H_SEQ])
+        self.data[seq % self.capacity] = record
+        self.header[_H_SEQ] = seq + 1     # publish after the slot is filled
+
+    # ---------- readers ----------
+    @property
+    def seq(self):
+        """Records written so far."""
+        return int(self.header[_H_SEQ])
+
+    def since(self, seq):
+        """(records written after `seq`, new seq); oldest ones lost if lapped."""
+        end = self.seq
+        start = max(seq, end - self.capacity, 0)
+        if end <= start:
+            return np.empty((0, self.n_fields), dtype=np.int32), end
+        idx = np.arange(start, end) % self.capacity
+        out = self.data[idx]                 # fancy indexing copies
+        # the writer may have overwritten the oldest slots while we copied
+        # (including the one it is filling right now)
+        lapped = self.seq + 1 - self.capacity - start
+        if lapped > 0:
+            out = out[lapped:]
+        return out, end
+
+    def latest(self, n):
+        """Up to the last n records, oldest first."""
+        return self.since(self.seq - n)[0]
+
+    def close(self):
+        self.header = self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    p = argparse.ArgumentParser(description="Print records from a StepRing")
+    p.add_argument("name")
+    p.add_argument("-n", type=int, default=20, help="how many latest records")
+    p.add_argument("--follow", action="store_true", help="keep printing new records")
+    args = p.parse_args()
+
+    try:
+        ring = StepRing.attach(args.name)
+    except FileNotFoundError:
+        sys.exit(f"no shared memory named {args.name!r} (is the run going?)")
+    print(",".join(FIELDS[:ring.n_fields]))
+    seq = ring.seq - args.n
+    try:
+        while True:
+            rows, seq = ring.since(seq)
+            for r in rows:
+                print(",".join(map(str, r)))
+            if not args.follow:
+                break
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.close()
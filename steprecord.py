@@ -0,0 +1,180 @@
+# steprecord.py
+# Compact per-step state shared by sensing, decision and telemetry.
+#
+# Approaches have fixed indices (GROUPS order, the same codes as
+# shm_ring.GROUP_CODES and the run log's SelectedGroup categories). A
+# StepRecord is allocated once per run; every step overwrites its int
+# arrays in place instead of building new dicts and row lists:
+#
+#   counts, halting, out_counts   array('i') per approach, from the sensor
+#   estimate                      fused counts the policy sees (estimator.py)
+#   yolo                          per-approach detector counts
+#   active                        bitmask of approaches with vehicles
+#
+# Policies keep their dict interface through GroupView, a read-only
+# mapping over one of the arrays.
+#
+# The decision debug log stores active groups as that bitmask and the
+# cycle order as approach initials, e.g. 3 and "WES" instead of
+# "['north', 'east']" and "['west', 'east', 'south']":
+#
+#   groups_of(3)          ['north', 'east']
+#   decode_order("WES")   ['west', 'east', 'south']
+
+from array import array
+
+from runlog import GROUPS
+
+N = len(GROUPS)
+INDEX = {g: i for i, g in enumerate(GROUPS)}
+BIT = {g: 1 << i for i, g in enumerate(GROUPS)}
+LETTER = {g: g[0].upper() for g in GROUPS}
+FROM_LETTER = {v: g for g, v in LETTER.items()}
+
+# telemetry row, in adaptive_compare.AI_COLUMNS order (SelectedGroup as its code)
+ROW_FIELDS = ["step", "north", "east", "south", "west", "selected", "yolo_total", "fused", "green"]
+
+
+# ==========================================================
+# ENCODING
+# ==========================================================
+def active_mask(values):
+    """Bitmask of the approaches with a non-zero value (GROUPS order)."""
+    m = 0
+    for i in range(N):
+        if values[i] > 0:
+            m |= 1 << i
+    return m
+
+
+def groups_of(mask):
+    return [g for i, g in enumerate(GROUPS) if mask >> i & 1]
+
+
+def encode_order(groups):
+    return "".join(LETTER[g] for g in groups)
+
+
+def is_order(text):
+    """True for an encoded cycle order: approach initials only ("" included)."""
+    return isinstance(text, str) and all(c in FROM_LETTER for c in text)
+
+
+def decode_order(text):
+    return [FROM_LETTER[c] for c in text] if is_order(text) else []
+
+
+def decode_debug_frame(df):
+    """Readable copy of a decision debug log (bitmask / initials expanded).
+
+    Logs written before this encoding (list reprs) are passed through.
+    """
+    df = df.copy()
+    if "ActiveGroups" in df and df["ActiveGroups"].dtype.kind in "iu":
+        df["ActiveGroups"] = df["ActiveGroups"].map(lambda m: ", ".join(groups_of(int(m))))
+    if "CycleOrder" in df:
+        # empty orders read back as NaN
+        df["CycleOrder"] = df["CycleOrder"].map(
+            lambda s: ", ".join(decode_order(s)) if is_order(s) else ("" if s != s else s))
+    return df
+
+
+# ==========================================================
+# RECORD
+# ==========================================================
+class GroupView:
+    """Read-only {group: value} mapping over a per-approach int array."""
+
+    __slots__ = ("_a",)
+
+    def __init__(self, values):
+        self._a = values
+
+    def __getitem__(self, g):
+        return self._a[INDEX[g]]
+
+    def get(self, g, default=None):
+        i = INDEX.get(g)
+        return default if i is None else self._a[i]
+
+    def __contains__(self, g):
+        return g in INDEX
+
+    def __iter__(self):
+        return iter(GROUPS)
+
+    def __len__(self):
+        return N
+
+    def keys(self):
+        return GROUPS
+
+    def values(self):
+        return self._a
+
+    def items(self):
+        return zip(GROUPS, self._a)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class StepRecord:
+    __slots__ = ("step", "counts", "halting", "out_counts", "estimate", "yolo",
+                 "yolo_total", "fused", "selected", "green", "active",
+                 "count_view", "halting_view", "out_view", "estimate_view", "row", "ring")
+
+    def __init__(self):
+        self.step = 0
+        self.counts = array("i", bytes(4 * N))
+        self.halting = array("i", bytes(4 * N))
+        self.out_counts = array("i", bytes(4 * N))
+        self.estimate = array("i", bytes(4 * N))
+        self.yolo = array("i", bytes(4 * N))
+        self.yolo_total = 0
+        self.fused = 0
+        self.selected = -1       # INDEX of the group holding the signal, -1 = none
+        self.green = 0
+        self.active = 0
+        self.count_view = GroupView(self.counts)
+        self.halting_view = GroupView(self.halting)
+        self.out_view = GroupView(self.out_counts)
+        self.estimate_view = GroupView(self.estimate)
+        self.row = array("i", bytes(4 * len(ROW_FIELDS)))
+        self.ring = array("i", bytes(4 * (len(ROW_FIELDS) + N)))
+
+    def read_sensor(self, sensor, in_edges, out_edges):
+        """Fill counts/halting/out_counts from a SubscriptionSensor's cache.
+
+        in_edges / out_edges: edge ids in GROUPS order.
+        """
+        ec, eh = sensor.edge_counts, sensor.edge_halting
+        for i in range(N):
+            e = in_edges[i]
+            self.counts[i] = ec.get(e, 0)
+            self.halting[i] = eh.get(e, 0)
+            self.out_counts[i] = ec.get(out_edges[i], 0)
+        self.active = active_mask(self.counts)
+
+    def fill_row(self):
+        """Telemetry row (ROW_FIELDS order) in the reused `row` array."""
+        r = self.row
+        r[0] = self.step
+        r[1:5] = self.counts
+        r[5] = self.selected
+        r[6] = self.yolo_total
+        r[7] = self.fused
+        r[8] = self.green
+        return r
+
+    def ring_row(self):
+        """Values in shm_ring.FIELDS order (for StepRing.write), reused array."""
+        r = self.ring
+        r[0] = self.step
+        r[1:5] = self.counts
+        r[5] = self.selected
+        r[6] = self.green
+        r[7] = self.yolo_total
+        r[8] = self.fused
+        r[9:13] = self.yolo
+        return r
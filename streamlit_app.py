@@ -4,12 +4,21 @@
 
 import streamlit as st
 import subprocess
+import threading
 import pandas as pd
 import os
 import time
+from collections import deque
 import plotly.graph_objs as go
 import plotly.express as px
 
+from runlog import runlog_path, read_runlog
+from profiling import load_timings
+from live_summary import LiveSummary
+from live_channel import Subscriber
+from steprecord import decode_debug_frame
+import yolo_worker
+
 # ---------------- Config ----------------
 BASE_DIR = r"C:\Users\Mokshitha Thota\Documents\projects\AI POWERED TSP\SendAnywhere_746655\AdaptiveTrafficNEW"
 UPLOADED_SCRIPT_PATH = os.path.join(BASE_DIR, "adaptive_main.py")  # provided earlier in this conversation
@@ -19,8 +28,10 @@ PERF_BASE = os.path.join(BASE_DIR, "performance_baseline.csv")
 AI_CYCLE = os.path.join(BASE_DIR, "ai_cycle_debug.csv")
 SIM_SCRIPT_MAIN = os.path.join(BASE_DIR, "adaptive_main.py")
 SIM_SCRIPT_COMPARE = os.path.join(BASE_DIR, "adaptive_compare.py")
+YOLO_WORKER_SCRIPT = os.path.join(BASE_DIR, "yolo_worker.py")
 FRAME_PNG = os.path.join(BASE_DIR, "frame.png")
 FRAME_PNG_MNT = "/mnt/data/frame.png"   # container fallback (not used now)
+LIVE_REFRESH = 0.5      # seconds between live chart updates while a run is going
 # ----------------------------------------
 
 st.set_page_config(page_title="AI Traffic Signal — Analytics", layout="wide", initial_sidebar_state="collapsed")
@@ -50,31 +61,25 @@ def read_csv_safe(path):
         except Exception:
             return None
 
+def read_run_safe(path):
+    """Per-step run log: typed .npz if present and current, else the CSV."""
+    npz = runlog_path(path)
+    if os.path.exists(npz) and (not os.path.exists(path) or os.path.getmtime(npz) >= os.path.getmtime(path)):
+        try:
+            return read_runlog(npz)
+        except Exception:
+            pass
+    return read_csv_safe(path)
+
+def run_exists(path):
+    return os.path.exists(path) or os.path.exists(runlog_path(path))
+
 def fmt(x):
     try:
         return f"{float(x):.2f}"
     except Exception:
         return "-"
 
-def compute_total_vehicles_from_df(df):
-    if df is None:
-        return '-'
-    cols = {c.lower(): c for c in df.columns}
-    # throughput
-    if 'throughput' in cols:
-        try:
-            return int(df[cols['throughput']].sum())
-        except Exception:
-            pass
-    # wide format north/east/south/west
-    if all(k in cols for k in ['north','east','south','west']):
-        try:
-            total = int(df[[cols['north'], cols['east'], cols['south'], cols['west']]].sum(axis=1).sum())
-            return total
-        except Exception:
-            pass
-    return '-'
-
 # --- Safe rerun wrapper (covers multiple Streamlit versions) ---
 def safe_rerun():
     """Try to trigger a rerun across different Streamlit versions.
@@ -107,6 +112,14 @@ if st.session_state.get("_safe_rerun_requested"):
     st.session_state["_safe_rerun_requested"] = False
 
 
+def get_live_summary():
+    # one incremental aggregator per run log, kept across reruns
+    live = st.session_state.get("_live_summary")
+    if live is None:
+        live = st.session_state["_live_summary"] = LiveSummary({"base": PERF_BASE, "ai": PERF_AI})
+    return live
+
+
 def compute_summary():
     summary = {
         'total_base':'-','total_ai':'-',
@@ -116,82 +129,142 @@ def compute_summary():
         'time_series': None
     }
 
-    if os.path.exists(PERF_BASE) and os.path.exists(PERF_AI):
-        dfb = read_csv_safe(PERF_BASE)
-        dfa = read_csv_safe(PERF_AI)
-        if dfb is None or dfa is None:
-            return summary
-
-        total_base = compute_total_vehicles_from_df(dfb)
-        total_ai = compute_total_vehicles_from_df(dfa)
-
-        dirs = ['North','East','South','West']
-        avg_base = {d:'-' for d in dirs}
-        avg_ai = {d:'-' for d in dirs}
-
-        lcols_b = [c.lower() for c in dfb.columns]
-        if 'region' in lcols_b and 'avg_queue' in lcols_b:
-            cmap = {c.lower(): c for c in dfb.columns}
-            gb = dfb.groupby(cmap['region'])[cmap['avg_queue']].mean().to_dict()
-            for d in dirs:
-                v = gb.get(d, None)
-                if v is not None and not pd.isna(v):
-                    avg_base[d] = fmt(v)
-        else:
-            cmap = {c.lower(): c for c in dfb.columns}
-            if all(k in cmap for k in ['north','east','south','west']):
-                for d in dirs:
-                    try:
-                        avg_base[d] = fmt(dfb[cmap[d.lower()]].mean())
-                    except Exception:
-                        avg_base[d] = '-'
-
-        lcols_a = [c.lower() for c in dfa.columns]
-        if 'region' in lcols_a and 'avg_queue' in lcols_a:
-            cmap = {c.lower(): c for c in dfa.columns}
-            ga = dfa.groupby(cmap['region'])[cmap['avg_queue']].mean().to_dict()
-            for d in dirs:
-                v = ga.get(d, None)
-                if v is not None and not pd.isna(v):
-                    avg_ai[d] = fmt(v)
-        else:
-            cmap = {c.lower(): c for c in dfa.columns}
-            if all(k in cmap for k in ['north','east','south','west']):
-                for d in dirs:
-                    try:
-                        avg_ai[d] = fmt(dfa[cmap[d.lower()]].mean())
-                    except Exception:
-                        avg_ai[d] = '-'
-
-        # reduction
-        try:
-            s_base = sum([float(x) for x in avg_base.values() if x != '-'])
-            s_ai = sum([float(x) for x in avg_ai.values() if x != '-'])
-            red = round(100.0*(s_base - s_ai)/s_base, 2) if (s_base not in (0,'-') and s_base !=0) else '-'
-        except Exception:
-            red = '-'
-
-        # optional time series
-        time_df = None
-        for df_try in (dfb, dfa):
-            cols_try = [c.lower() for c in df_try.columns]
-            if ('step' in cols_try or 'time' in cols_try) and all(k in cols_try for k in ['north','east','south','west']):
-                step_col = [c for c in df_try.columns if c.lower() in ('step','time')][0]
-                time_df = df_try[[step_col] + [c for c in df_try.columns if c.lower() in ('north','east','south','west')]].copy()
-                time_df.columns = ['Step','North','East','South','West']
-                break
-
-        summary = {
-            'total_base': total_base,
-            'total_ai': total_ai,
-            'avg_queue_base': avg_base,
-            'avg_queue_ai': avg_ai,
-            'ai_queue_reduction': red,
-            'time_series': time_df
-        }
+    if not (run_exists(PERF_BASE) and run_exists(PERF_AI)):
+        return summary
+
+    # only rows written since the last click are read
+    live = get_live_summary()
+    live.refresh()
+    base, ai = live["base"], live["ai"]
+    if base.layout is None or ai.layout is None:
+        return summary
+
+    avg_base = {d: fmt(v) if v is not None else '-' for d, v in base.avg_queue().items()}
+    avg_ai = {d: fmt(v) if v is not None else '-' for d, v in ai.avg_queue().items()}
+
+    # reduction
+    try:
+        s_base = sum([float(x) for x in avg_base.values() if x != '-'])
+        s_ai = sum([float(x) for x in avg_ai.values() if x != '-'])
+        red = round(100.0*(s_base - s_ai)/s_base, 2) if s_base != 0 else '-'
+    except Exception:
+        red = '-'
+
+    # optional time series (decimated for long runs)
+    time_df = base.time_series()
+    if time_df is None:
+        time_df = ai.time_series()
+
+    t_base, t_ai = base.total(), ai.total()
+    summary = {
+        'total_base': t_base if t_base is not None else '-',
+        'total_ai': t_ai if t_ai is not None else '-',
+        'avg_queue_base': avg_base,
+        'avg_queue_ai': avg_ai,
+        'ai_queue_reduction': red,
+        'time_series': time_df
+    }
 
     return summary
 
+def yolo_worker_key():
+    # the running worker's key if there is one, else random per dashboard
+    # session; handed to the worker and to the runs
+    if "_yolo_key" not in st.session_state:
+        st.session_state["_yolo_key"] = yolo_worker.running_key() or yolo_worker.new_authkey()
+    return st.session_state["_yolo_key"]
+
+
+def ensure_yolo_worker():
+    # start the background model worker once; runs connect to it via YOLO_WORKER=1
+    key = yolo_worker_key()
+    if yolo_worker.is_running(authkey=bytes.fromhex(key)):
+        return True
+    # started meanwhile by another session or by hand: use its key
+    other = yolo_worker.running_key()
+    if other:
+        st.session_state["_yolo_key"] = other
+        return True
+    proc = st.session_state.get("_yolo_worker")
+    if proc is None or proc.poll() is not None:
+        try:
+            st.session_state["_yolo_worker"] = subprocess.Popen(
+                ["python", YOLO_WORKER_SCRIPT], cwd=BASE_DIR,
+                env={**os.environ, yolo_worker.KEY_ENV: key},
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        except Exception as e:
+            st.warning(f"Could not start YOLO worker: {e}")
+            return False
+    return True
+
+
+def get_live_subscriber():
+    # bound once per session; None if another dashboard already holds the port
+    if "_live_sub" not in st.session_state:
+        try:
+            st.session_state["_live_sub"] = Subscriber()
+        except OSError:
+            st.session_state["_live_sub"] = None
+    return st.session_state["_live_sub"]
+
+
+def is_log_noise(line):
+    low = line.lower()
+    return ("ultralytics" in low) or ("yolo disabled" in low) or ("no module named 'ultralytics'" in low)
+
+
+def pump_lines(stream, lines):
+    # reader thread: stdout never blocks the UI loop
+    for ln in stream:
+        if not is_log_noise(ln):
+            lines.append(ln.rstrip())
+
+
+def plot_live(sub, placeholder):
+    msg = sub.latest()
+    if msg is None:
+        return
+    run = msg["run"]
+    df = sub.frame(run)
+    df = df[df["North"].notna()] if "North" in df.columns else df
+    if df.empty:
+        return
+    fig = go.Figure()
+    for d in ['North','East','South','West']:
+        fig.add_trace(go.Scatter(x=df['Step'], y=df[d], mode='lines', name=d))
+    state = "finished" if msg.get("done") else "live"
+    fig.update_layout(title=f"{run} ({state}) — step {msg['Step']}", height=360, template='plotly_white')
+    placeholder.plotly_chart(fig, use_container_width=True)
+
+
+def run_streaming(cmd, env, logs_box, live_box, spinner_text):
+    """Run cmd, showing its filtered stdout and live channel plots; returns the log lines."""
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=env)
+    except Exception as e:
+        st.error(f"Failed to start simulation: {e}")
+        return None
+
+    lines = deque(maxlen=300)
+    reader = threading.Thread(target=pump_lines, args=(proc.stdout, lines), daemon=True)
+    reader.start()
+    sub = get_live_subscriber()
+    if sub:
+        sub.clear()
+    with st.spinner(spinner_text):
+        while proc.poll() is None:
+            if sub and sub.poll():
+                plot_live(sub, live_box)
+            logs_box.text("\n".join(lines))
+            time.sleep(LIVE_REFRESH)
+    reader.join(timeout=2)
+    if sub:
+        sub.poll()
+        plot_live(sub, live_box)
+    return list(lines)
+
+
 def show_kpis_area(summary, placeholder):
     t_base = summary.get('total_base', '-')
     t_ai = summary.get('total_ai', '-')
@@ -266,6 +339,8 @@ with right_col:
     analyze_clicked = bc2.button("📊 Analyze (show dashboard)")
     show_kpi_clicked = bc3.button("🔍 Show KPI & Chart")
     reset_clicked = bc4.button("🔄 Reset State")
+    warm_yolo = st.checkbox("Keep YOLO model warm between runs", value=False,
+                            help="runs a background yolo_worker.py so the comparison run skips model loading")
 
     # IMPORTANT: we intentionally removed the central simulation frame image display per request.
     # The viewer area is no longer used for the static WhatsApp image.
@@ -273,14 +348,14 @@ with right_col:
 with left_col:
     st.header("Files & Logs")
     if st.button("Open: Baseline CSV"):
-        df = read_csv_safe(PERF_BASE)
+        df = read_run_safe(PERF_BASE)
         if df is not None:
             st.dataframe(df)
             st.download_button("Download baseline CSV", df.to_csv(index=False, encoding='utf-8'), file_name="performance_baseline.csv")
         else:
             st.warning("performance_baseline.csv not found or unreadable.")
     if st.button("Open: AI CSV"):
-        df = read_csv_safe(PERF_AI)
+        df = read_run_safe(PERF_AI)
         if df is not None:
             st.dataframe(df)
             st.download_button("Download ai CSV", df.to_csv(index=False, encoding='utf-8'), file_name="performance_ai.csv")
@@ -289,17 +364,36 @@ with left_col:
     if st.button("Open: AI Cycle CSV"):
         df = read_csv_safe(AI_CYCLE)
         if df is not None:
-            st.dataframe(df)
+            st.dataframe(decode_debug_frame(df))
             st.download_button("Download ai_cycle_debug.csv", df.to_csv(index=False, encoding='utf-8'), file_name="ai_cycle_debug.csv")
         else:
             st.warning("ai_cycle_debug.csv not found or unreadable.")
+    if st.button("⏱ Stage timings"):
+        rows = []
+        for run, path in (("Baseline", PERF_BASE), ("AI", PERF_AI)):
+            t = load_timings(path)
+            if not t:
+                continue
+            for stage, r in list(t["stages"].items()) + [("step", t["step"])]:
+                if r.get("count"):
+                    rows.append({"Run": run, "Stage": stage, "Count": r["count"],
+                                 "p50 us": r["p50_us"], "p95 us": r["p95_us"],
+                                 "p99 us": r["p99_us"], "Total s": r["total_s"]})
+        if rows:
+            tdf = pd.DataFrame(rows)
+            st.dataframe(tdf)
+            fig_t = px.bar(tdf[tdf["Stage"] != "step"], x="Stage", y="p95 us", color="Run",
+                           barmode="group", title="p95 per loop stage (us)")
+            st.plotly_chart(fig_t, use_container_width=True)
+        else:
+            st.warning("No timings found. Run adaptive_compare.py with --profile-stages.")
     logs_box = st.empty()
 
 # quick reset
 if reset_clicked:
     safe_rerun()
 
-# run simulation (keeps previous synchronous streaming + log filtering)
+# run simulation: logs come from stdout, live charts from the telemetry channel
 if run_clicked:
     if not os.path.exists(SIM_SCRIPT_MAIN):
         st.error("adaptive_main.py not found in project folder.")
@@ -307,56 +401,23 @@ if run_clicked:
         env = os.environ.copy()
         env["PYTHONIOENCODING"] = "utf-8"
         env["PYTHONUTF8"] = "1"
+        if warm_yolo and ensure_yolo_worker():
+            env["YOLO_WORKER"] = "1"
+            env[yolo_worker.KEY_ENV] = yolo_worker_key()
+        live_box = st.empty()
 
-        try:
-            proc = subprocess.Popen(
-                ["python", SIM_SCRIPT_MAIN],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                env=env
-            )
-        except Exception as e:
-            st.error(f"Failed to start simulation: {e}")
-            proc = None
-
-        if proc:
-            lines = []
-            with st.spinner("Simulation running..."):
-                while True:
-                    ln = proc.stdout.readline()
-                    if ln == "" and proc.poll() is not None:
-                        break
-                    if ln:
-                        low = ln.lower()
-                        # filter YOLO noise
-                        if ("ultralytics" in low) or ("yolo disabled" in low) or ("no module named 'ultralytics'".lower() in low):
-                            continue
-                        lines.append(ln.rstrip())
-                        logs_box.text("\n".join(lines[-300:]))
-
-            proc.wait()
-            logs_box.text("\n".join(lines[-300:] + ["✅ Simulation finished."]))
+        lines = run_streaming(["python", SIM_SCRIPT_MAIN], env, logs_box, live_box, "Simulation running...")
+        if lines is not None:
+            logs_box.text("\n".join(lines + ["✅ Simulation finished."]))
 
             # compare script optional
             if os.path.exists(SIM_SCRIPT_COMPARE):
-                try:
-                    pc = subprocess.Popen(["python", SIM_SCRIPT_COMPARE], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=env)
-                    comp_lines = []
-                    with st.spinner("Running compare..."):
-                        while True:
-                            cl = pc.stdout.readline()
-                            if cl == "" and pc.poll() is not None:
-                                break
-                            if cl:
-                                if ("ultralytics" in cl.lower()) or ("yolo disabled" in cl.lower()):
-                                    continue
-                                comp_lines.append(cl.rstrip())
-                                logs_box.text("\n".join(comp_lines[-300:]))
-                        pc.wait()
-                    logs_box.text("\n".join(lines[-300:] + ["✅ Compare finished."]))
-                except Exception:
+                comp_lines = run_streaming(["python", SIM_SCRIPT_COMPARE], env, logs_box, live_box,
+                                           "Running compare...")
+                if comp_lines is None:
                     st.warning("Compare script failed or produced no output.")
+                else:
+                    logs_box.text("\n".join(lines + ["✅ Compare finished."]))
 
 # Analyze => show KPI cards and charts in a full-width analytics area at bottom
 # Show KPI & Chart does the same (use whichever you prefer)
@@ -0,0 +1,211 @@
+# sumo_outputs.py
+# Traffic KPIs from SUMO's own output files.
+#
+# SUMO can write, while it runs and at no TraCI cost:
+#   --tripinfo-output   one record per vehicle: time loss (delay), waiting
+#                       time, number of stops, arrival
+#   --queue-output      per lane and step: queue length and queueing time
+#   --summary-output    per step: inserted/running/arrived/halting totals
+#
+# output_args(prefix) builds the command-line options, reduce_outputs(prefix)
+# streams the three files with iterparse (elements are cleared as soon as
+# they are counted, so memory stays constant however long the run) and
+# reduces them to per-approach KPIs, saved next to the run log as
+# <prefix>.kpis.json.
+#
+#   python sumo_outputs.py performance_ai
+
+import json
+import os
+import xml.etree.ElementTree as ET
+
+OUTPUTS = ("tripinfo", "queue", "summary")
+KPIS_EXT = ".kpis.json"
+ALL = "all"
+
+
+def output_paths(prefix):
+    prefix = os.path.splitext(prefix)[0]
+    return {kind: f"{prefix}.{kind}.xml" for kind in OUTPUTS}
+
+
+def output_args(prefix):
+    """SUMO options writing tripinfo/queue/summary files for `prefix`."""
+    paths = output_paths(prefix)
+    return [
+        "--tripinfo-output", paths["tripinfo"],
+        "--tripinfo-output.write-unfinished", "true",
+        "--queue-output", paths["queue"],
+        "--summary-output", paths["summary"],
+    ]
+
+
+def _stream(path, tags, top):
+    """Yield (tag, attrib) for every closed element in `tags`.
+
+    Elements are cleared once yielded, and the root is emptied at every
+    top-level element, so nothing accumulates.
+    """
+    it = ET.iterparse(path, events=("start", "end"))
+    _, root = next(it)
+    for event, elem in it:
+        if event != "end" or elem.tag not in tags:
+            continue
+        yield elem.tag, elem.attrib
+        elem.clear()
+        if elem.tag == top:
+            root.clear()
+
+
+def _approach(lane, approaches):
+    edge = lane.rpartition("_")[0]
+    if approaches is None:
+        return edge
+    return approaches.get(edge)
+
+
+# ==========================================================
+# TRIPINFO
+# ==========================================================
+def parse_tripinfo(path, approaches=None):
+    """Per-approach delay, waiting time, stops and throughput.
+
+    approaches maps incoming edge id -> approach name; vehicles that did
+    not depart on one of them are only counted under "all".
+    """
+    acc = {}
+    for _, a in _stream(path, {"tripinfo"}, "tripinfo"):
+        arrived = float(a.get("arrival", -1)) >= 0
+        rec = (
+            1, int(arrived),
+            float(a.get("timeLoss", 0.0)), float(a.get("waitingTime", 0.0)),
+            int(a.get("waitingCount", 0)), float(a.get("duration", 0.0)) if arrived else 0.0,
+        )
+        keys = [ALL]
+        appr = _approach(a.get("departLane", ""), approaches)
+        if appr:
+            keys.append(appr)
+        for k in keys:
+            s = acc.setdefault(k, [0, 0, 0.0, 0.0, 0, 0.0])
+            for i, v in enumerate(rec):
+                s[i] += v
+
+    out = {}
+    for k, (n, arrived, loss, wait, stops, dur) in acc.items():
+        out[k] = {
+            "vehicles": n,
+            "throughput": arrived,
+            "mean_delay_s": round(loss / n, 2),
+            "mean_waiting_s": round(wait / n, 2),
+            "mean_stops": round(stops / n, 3),
+            "mean_travel_s": round(dur / arrived, 2) if arrived else None,
+        }
+    return out
+
+
+# ==========================================================
+# QUEUE
+# ==========================================================
+def parse_queue(path, approaches=None):
+    """Per-approach mean/max queue length (m) and mean queueing time (s)."""
+    steps = 0
+    total, peak, qtime, qtime_n = {}, {}, {}, {}
+    now = {}
+    for tag, a in _stream(path, {"lane", "data"}, "data"):
+        if tag == "lane":
+            appr = _approach(a.get("id", ""), approaches)
+            if appr:
+                now[appr] = now.get(appr, 0.0) + float(a.get("queueing_length", 0.0))
+                qtime[appr] = qtime.get(appr, 0.0) + float(a.get("queueing_time", 0.0))
+                qtime_n[appr] = qtime_n.get(appr, 0) + 1
+            continue
+        steps += 1
+        for appr, v in now.items():
+            total[appr] = total.get(appr, 0.0) + v
+            peak[appr] = max(peak.get(appr, 0.0), v)
+        now = {}
+
+    return {
+        appr: {
+            "mean_queue_m": round(total[appr] / steps, 2) if steps else 0.0,
+            "max_queue_m": round(peak[appr], 2),
+            "mean_queueing_time_s": round(qtime[appr] / qtime_n[appr], 2),
+        }
+        for appr in total
+    }
+
+
+# ==========================================================
+# SUMMARY
+# ==========================================================
+def parse_summary(path):
+    """Network totals: final counts plus mean/max halting vehicles."""
+    last = None
+    steps = 0
+    halting = 0
+    max_halting = 0
+    for _, a in _stream(path, {"step"}, "step"):
+        last = dict(a)
+        h = int(a.get("halting", 0))
+        halting += h
+        max_halting = max(max_halting, h)
+        steps += 1
+    if last is None:
+        return {}
+    return {
+        "end_time": float(last.get("time", 0.0)),
+        "inserted": int(last.get("inserted", 0)),
+        "arrived": int(last.get("arrived", 0)),
+        "running": int(last.get("running", 0)),
+        "waiting_insertion": int(last.get("waiting", 0)),
+        "teleports": int(last.get("teleports", 0)),
+        "mean_halting": round(halting / steps, 2),
+        "max_halting": max_halting,
+    }
+
+
+# ==========================================================
+# REDUCE + SIDECAR
+# ==========================================================
+def kpis_path(prefix):
+    return os.path.splitext(prefix)[0] + KPIS_EXT
+
+
+def reduce_outputs(prefix, approaches=None, save=True):
+    """Parse whatever output files exist for `prefix`; None if there are none."""
+    paths = output_paths(prefix)
+    if not any(os.path.exists(p) for p in paths.values()):
+        return None
+    kpis = {"approaches": {}, "network": {}}
+    try:
+        if os.path.exists(paths["tripinfo"]):
+            for k, v in parse_tripinfo(paths["tripinfo"], approaches).items():
+                kpis["approaches"].setdefault(k, {}).update(v)
+        if os.path.exists(paths["queue"]):
+            for k, v in parse_queue(paths["queue"], approaches).items():
+                kpis["approaches"].setdefault(k, {}).update(v)
+        if os.path.exists(paths["summary"]):
+            kpis["network"] = parse_summary(paths["summary"])
+    except ET.ParseError as e:
+        # SUMO killed mid-run leaves a truncated file
+        print(f"[WARN] incomplete SUMO output for {prefix}: {e}")
+    if save:
+        with open(kpis_path(prefix), "w", encoding="utf-8") as f:
+            json.dump(kpis, f, indent=1)
+    return kpis
+
+
+def load_kpis(prefix):
+    p = kpis_path(prefix)
+    if not os.path.exists(p):
+        return None
+    with open(p, encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    import sys
+
+    for prefix in sys.argv[1:]:
+        k = reduce_outputs(prefix, save=False)
+        print(json.dumps(k, indent=1) if k else f"no SUMO outputs for {prefix}")
@@ -0,0 +1,59 @@
+# telemetry.py
+# Buffered CSV writer shared by the simulation loops.
+# One open handle per file; rows are kept in memory and written in batches
+# (by row count or elapsed time) instead of reopening the file every step.
+
+import csv
+import time
+
+FLUSH_ROWS = 200          # write after this many buffered rows
+FLUSH_INTERVAL = 2.0      # ... or after this many seconds, whichever first
+
+
+class TelemetrySink:
+    """Append-only CSV sink with batched flushing.
+
+    Use as a context manager so buffered rows are flushed on normal exit
+    and when the simulation loop raises.
+    """
+
+    def __init__(self, path, header, flush_rows=FLUSH_ROWS, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._f = open(path, "w", newline="", encoding="utf-8")
+        self._w = csv.writer(self._f)
+        self._w.writerow(header)
+        self._rows = []
+        self._last_flush = time.monotonic()
+
+    def write(self, row):
+        self._rows.append(row)
+        if (len(self._rows) >= self.flush_rows
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self._f is None:
+            return
+        if self._rows:
+            self._w.writerows(self._rows)
+            self._rows.clear()
+        self._f.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._f is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self._f.close()
+            self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
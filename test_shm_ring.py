@@ -0,0 +1,34 @@
+# test_shm_ring.py
+# StepRing reads before and after the ring wraps around.
+#
+#   python -m pytest -q test_shm_ring.py
+
+import os
+
+import numpy as np
+
+from shm_ring import StepRing
+
+
+def _ring(name, capacity, writes):
+    ring = StepRing.create(f"{name}_{os.getpid()}", capacity=capacity, n_fields=2)
+    for i in range(writes):
+        ring.write([i, 10 * i])
+    return ring
+
+
+def test_partly_filled_returns_written_records_only():
+    with _ring("tsp_test_partial", 16, 3) as ring:
+        assert ring.latest(5).tolist() == [[0, 0], [1, 10], [2, 20]]
+        rows, seq = ring.since(-5)
+        assert rows[:, 0].tolist() == [0, 1, 2] and seq == 3
+        assert len(ring.since(seq)[0]) == 0
+
+
+def test_wrapped_around_returns_latest_records():
+    with _ring("tsp_test_wrap", 16, 40) as ring:
+        assert ring.latest(5)[:, 0].tolist() == [35, 36, 37, 38, 39]
+        # the slot the writer would fill next is left out
+        rows = ring.latest(100)
+        assert rows[:, 0].tolist() == list(range(25, 40))
+        assert np.array_equal(rows[:, 1], rows[:, 0] * 10)
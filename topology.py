@@ -0,0 +1,250 @@
+# topology.py
+# Static network topology, parsed once from the .net.xml.
+#
+# Everything the controllers need about the signal layout is fixed by the
+# network file: which edges and lanes enter each traffic light, which link
+# index (position in the state string) belongs to which lane and movement,
+# and which compass direction each approach comes from. This module reads
+# it from the <edge>/<lane>, <connection> and <tlLogic> elements instead of
+# asking TraCI at every start or guessing from lane names.
+#
+# The parsed index is pickled next to the network, keyed on the file's
+# SHA-1, so startups only pay for parsing when the network changed.
+#
+#   topo = load_topology("network.net.xml")
+#   tls = topo.tls["center"]
+#   tls.approaches      {"north": ["north_in"], ...}
+#   tls.group_states(["north", "east", "south", "west"])   # G/y per group
+
+import hashlib
+import math
+import os
+import pickle
+import xml.etree.ElementTree as ET
+
+NET_FILE = "network.net.xml"
+CACHE_EXT = ".topology.pkl"
+CACHE_VERSION = 2
+
+COMPASS = ["east", "north", "west", "south"]   # by angle, counter-clockwise from +x
+
+
+class Link:
+    """One controlled connection: position `index` in the TLS state string."""
+
+    __slots__ = ("index", "from_edge", "from_lane", "to_edge", "to_lane", "dir")
+
+    def __init__(self, index, from_edge, from_lane, to_edge, to_lane, dir):
+        self.index = index
+        self.from_edge = from_edge
+        self.from_lane = from_lane
+        self.to_edge = to_edge
+        self.to_lane = to_lane
+        self.dir = dir          # SUMO movement: s, l, r, t, L, R
+
+    def __repr__(self):
+        return f"Link({self.index}, {self.from_lane}->{self.to_lane}, {self.dir})"
+
+
+class TlsInfo:
+    """Controlled links of one traffic light, grouped by approach.
+
+    links          Link per state-string position (None for unused slots)
+    in_edges       incoming edge ids, in link order
+    lanes          {edge: [incoming lane ids]}
+    link_indices   {edge: [state positions]}
+    edge_dir       {edge: compass direction the traffic comes from}
+    approaches     {direction: [edges]}
+    out_edges      {direction: [outgoing edges toward that direction]}
+    """
+
+    def __init__(self, tls_id, links, edge_dir, out_dir, programs):
+        self.id = tls_id
+        self.links = links
+        self.edge_dir = edge_dir
+        self.programs = programs
+        self.in_edges = list(dict.fromkeys(lk.from_edge for lk in links if lk))
+        self.lanes = {e: [] for e in self.in_edges}
+        self.link_indices = {e: [] for e in self.in_edges}
+        for lk in links:
+            if lk is None:
+                continue
+            if lk.from_lane not in self.lanes[lk.from_edge]:
+                self.lanes[lk.from_edge].append(lk.from_lane)
+            self.link_indices[lk.from_edge].append(lk.index)
+        self.approaches = {}
+        for e in self.in_edges:
+            self.approaches.setdefault(edge_dir[e], []).append(e)
+        outs = dict.fromkeys(lk.to_edge for lk in links if lk)
+        self.out_edges = {}
+        for e in outs:
+            self.out_edges.setdefault(out_dir[e], []).append(e)
+
+    @property
+    def n_links(self):
+        return len(self.links)
+
+    def controlled_lanes(self):
+        """Lane per link, like traci.trafficlight.getControlledLanes."""
+        return [lk.from_lane if lk else "" for lk in self.links]
+
+    def state(self, green_edges, col="G"):
+        """State string: `col` for links from `green_edges`, red elsewhere."""
+        green_edges = set(green_edges)
+        return "".join(col if lk and lk.from_edge in green_edges else "r" for lk in self.links)
+
+    def group_states(self, groups, green="G", yellow="y"):
+        """[green, yellow] state pairs for each approach direction in `groups`."""
+        states = []
+        for g in groups:
+            edges = self.approaches.get(g, ())
+            states += [self.state(edges, green), self.state(edges, yellow)]
+        return states
+
+
+class Topology:
+    def __init__(self, path, edges, tls):
+        self.path = path
+        self.edges = edges      # {edge: {"from", "to", "lanes": [ids], "length", "bbox"}}
+        self.tls = tls          # {tls id: TlsInfo}
+
+
+# ==========================================================
+# PARSING
+# ==========================================================
+def _compass(dx, dy):
+    a = math.atan2(dy, dx)
+    return COMPASS[int(round(a / (math.pi / 2))) % 4]
+
+
+def _shape(text):
+    return [tuple(map(float, p.split(","))) for p in text.split()]
+
+
+def parse_net(path):
+    edges, lane_shapes, nodes, conns, programs = {}, {}, {}, [], {}
+    for _, el in ET.iterparse(path, events=("end",)):
+        tag = el.tag
+        if tag == "lane":
+            lane_shapes[el.get("id")] = _shape(el.get("shape", ""))
+        elif tag == "edge":
+            if el.get("function") != "internal":
+                lanes = [ln.get("id") for ln in el.iter("lane")]
+                pts = [p for ln in lanes for p in lane_shapes.get(ln, ())]
+                edges[el.get("id")] = {
+                    "from": el.get("from"), "to": el.get("to"), "lanes": lanes,
+                    "length": float(el.find("lane").get("length", 0.0)) if lanes else 0.0,
+                    "bbox": (min(x for x, _ in pts), min(y for _, y in pts),
+                             max(x for x, _ in pts), max(y for _, y in pts)) if pts else None,
+                }
+            el.clear()
+        elif tag == "junction":
+            nodes[el.get("id")] = (float(el.get("x", 0.0)), float(el.get("y", 0.0)))
+            el.clear()
+        elif tag == "connection":
+            if el.get("tl") is not None and el.get("linkIndex") is not None:
+                conns.append(dict(el.attrib))
+        elif tag == "tlLogic":
+            programs.setdefault(el.get("id"), []).append({
+                "programID": el.get("programID"),
+                "phases": [(float(p.get("duration")), p.get("state")) for p in el.iter("phase")],
+            })
+            el.clear()
+
+    def heading(edge, at_end):
+        # compass direction of the edge's far end, seen from the junction
+        e = edges[edge]
+        shape = lane_shapes.get(e["lanes"][0]) if e["lanes"] else None
+        if shape and len(shape) >= 2:
+            (x0, y0), (x1, y1) = (shape[-1], shape[-2]) if at_end else (shape[0], shape[1])
+        else:
+            j, far = (e["to"], e["from"]) if at_end else (e["from"], e["to"])
+            (x0, y0), (x1, y1) = nodes[j], nodes[far]
+        return _compass(x1 - x0, y1 - y0)
+
+    by_tls = {}
+    for c in conns:
+        by_tls.setdefault(c["tl"], []).append(c)
+
+    tls = {}
+    for tls_id, cs in by_tls.items():
+        n = max(int(c["linkIndex"]) for c in cs) + 1
+        links = [None] * n
+        for c in cs:
+            i = int(c["linkIndex"])
+            links[i] = Link(i, c["from"], f"{c['from']}_{c['fromLane']}",
+                            c["to"], f"{c['to']}_{c['toLane']}", c.get("dir", ""))
+        in_edges = {lk.from_edge for lk in links if lk}
+        out_edges = {lk.to_edge for lk in links if lk}
+        edge_dir = {e: heading(e, at_end=True) for e in in_edges}
+        out_dir = {e: heading(e, at_end=False) for e in out_edges}
+        tls[tls_id] = TlsInfo(tls_id, links, edge_dir, out_dir, programs.get(tls_id, []))
+
+    return Topology(path, edges, tls)
+
+
+# ==========================================================
+# CACHE
+# ==========================================================
+_loaded = {}
+
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_topology(path=NET_FILE, cache=True):
+    """Topology of `path`, from memory, the pickle cache, or a fresh parse."""
+    path = os.path.abspath(path)
+    digest = file_hash(path)
+    hit = _loaded.get(path)
+    if hit and hit[0] == digest:
+        return hit[1]
+
+    cache_file = path + CACHE_EXT
+    topo = None
+    if cache and os.path.exists(cache_file):
+        try:
+            with open(cache_file, "rb") as f:
+                version, cached_digest, obj = pickle.load(f)
+            if version == CACHE_VERSION and cached_digest == digest:
+                topo = obj
+        except Exception:
+            topo = None
+    if topo is None:
+        topo = parse_net(path)
+        if cache:
+            try:
+                tmp = cache_file + ".tmp"
+                with open(tmp, "wb") as f:
+                    pickle.dump((CACHE_VERSION, digest, topo), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, cache_file)
+            except OSError:
+                pass   # read-only checkout: just parse next time
+    _loaded[path] = (digest, topo)
+    return topo
+
+
+def net_file_of(config):
+    """Network file referenced by a .sumocfg (resolved relative to it)."""
+    root = ET.parse(config).getroot()
+    el = root.find("./input/net-file")
+    if el is None:
+        return NET_FILE
+    return os.path.join(os.path.dirname(os.path.abspath(config)), el.get("value"))
+
+
+if __name__ == "__main__":
+    import sys
+
+    topo = load_topology(sys.argv[1] if len(sys.argv) > 1 else NET_FILE)
+    for tid, t in topo.tls.items():
+        print(f"TLS {tid}: {t.n_links} links")
+        for d, es in t.approaches.items():
+            for e in es:
+                print(f"  {d:<6} {e:<12} lanes={t.lanes[e]} links={t.link_indices[e]} "
+                      f"dirs={''.join(t.links[i].dir for i in t.link_indices[e])}")
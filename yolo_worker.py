@@ -0,0 +1,212 @@
+# yolo_worker.py
+# Long-lived local YOLO worker, so repeated runs skip model loading.
+#
+# Importing ultralytics and building the model takes seconds; the
+# dashboard starts a fresh simulation process for every run. The worker
+# loads the model once and serves vehicle counts over a local
+# multiprocessing.connection socket; simulation runs connect to it
+# (YOLO_WORKER=1 or --yolo-worker) and fall back to loading the model
+# themselves when no worker is running.
+#
+# multiprocessing.connection unpickles what it receives, so the socket is
+# guarded by a random per-session key: taken from YOLO_WORKER_KEY (hex) when
+# the launcher sets it, otherwise generated by the worker. Once the worker
+# holds the port it writes the key to a file only the current user can read;
+# clients look in the environment, then in that file.
+#
+#   python yolo_worker.py              # serve until stopped
+#   client = YoloClient.connect()      # None if no worker
+#   client.count_batch(frames)         # [vehicle count per frame]
+
+import os
+import secrets
+import tempfile
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("YOLO_WORKER_PORT", 47801))
+KEY_ENV = "YOLO_WORKER_KEY"
+MODEL = "yolov8n.pt"
+VEHICLE_CLASSES = {2, 3, 5, 7}   # car, motorcycle, bus, truck
+
+
+def new_authkey():
+    return secrets.token_hex(32)
+
+
+def key_file(port=PORT):
+    return os.path.join(tempfile.gettempdir(), f"tsp_yolo_worker_{port}.key")
+
+
+def write_key_file(key, port=PORT):
+    path = key_file(port)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    # O_EXCL + 0600: nobody else can have pre-created or read it
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(key)
+    return path
+
+
+def load_authkey(port=PORT):
+    """Session key as bytes (environment, then key file); None if unknown."""
+    key = os.environ.get(KEY_ENV)
+    if not key:
+        try:
+            with open(key_file(port)) as f:
+                key = f.read().strip()
+        except OSError:
+            return None
+    try:
+        return bytes.fromhex(key)
+    except ValueError:
+        return None
+
+
+def count_vehicles(results, classes=VEHICLE_CLASSES):
+    return [sum(1 for box in r.boxes if int(box.cls[0]) in classes) for r in results]
+
+
+class YoloClient:
+    def __init__(self, conn):
+        self._conn = conn
+        self._lock = threading.Lock()
+
+    @classmethod
+    def connect(cls, host=HOST, port=PORT, authkey=None):
+        authkey = authkey or load_authkey(port)
+        if authkey is None:
+            return None
+        try:
+            conn = Client((host, port), authkey=authkey)
+        except (OSError, EOFError, AuthenticationError):
+            return None
+        client = cls(conn)
+        return client if client.ping() else None
+
+    def _call(self, *msg):
+        with self._lock:
+            self._conn.send(msg)
+            reply = self._conn.recv()
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def ping(self):
+        try:
+            return self._call("ping") == "pong"
+        except (OSError, EOFError):
+            return False
+
+    def count_batch(self, frames):
+        return self._call("count", list(frames))
+
+    def shutdown(self):
+        try:
+            self._call("shutdown")
+        except (OSError, EOFError):
+            pass
+
+    def close(self):
+        self._conn.close()
+
+
+def is_running(host=HOST, port=PORT, authkey=None):
+    client = YoloClient.connect(host, port, authkey)
+    if client is None:
+        return False
+    client.close()
+    return True
+
+
+def running_key(host=HOST, port=PORT):
+    """Hex key of the worker serving on `port` (from its key file); None if none answers."""
+    try:
+        with open(key_file(port)) as f:
+            key = f.read().strip()
+        authkey = bytes.fromhex(key)
+    except (OSError, ValueError):
+        return None
+    return key if is_running(host, port, authkey) else None
+
+
+def serve(model_path=MODEL, host=HOST, port=PORT):
+    import numpy as np
+    from ultralytics import YOLO
+
+    key = os.environ.get(KEY_ENV) or new_authkey()
+    authkey = bytes.fromhex(key)
+
+    model = YOLO(model_path)
+    model(np.zeros((64, 64, 3), dtype=np.uint8), verbose=False)   # warm-up
+    lock = threading.Lock()        # one inference at a time on the model
+    stop = threading.Event()
+
+    def handle(conn):
+        with conn:
+            while True:
+                try:
+                    msg = conn.recv()
+                except (EOFError, OSError):
+                    return
+                kind = msg[0]
+                try:
+                    if kind == "ping":
+                        reply = "pong"
+                    elif kind == "count":
+                        with lock:
+                            reply = count_vehicles(model(msg[1], verbose=False))
+                    elif kind == "shutdown":
+                        conn.send("bye")
+                        stop.set()
+                        return
+                    else:
+                        reply = ValueError(f"unknown request {kind!r}")
+                except Exception as e:
+                    reply = e
+                conn.send(reply)
+
+    # bind first: if another worker holds the port, its key file stays intact
+    with Listener((host, port), authkey=authkey) as listener:
+        path = write_key_file(key, port)
+        print(f"YOLO worker ready on {host}:{port} ({model_path})", flush=True)
+        try:
+            while not stop.is_set():
+                try:
+                    conn = listener.accept()
+                except Exception:
+                    # failed handshake (wrong authkey, client gone): keep serving
+                    continue
+                if stop.is_set():
+                    conn.close()
+                    break
+                threading.Thread(target=handle, args=(conn,), daemon=True).start()
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser(description="Keep a YOLO model loaded for simulation runs")
+    p.add_argument("--model", default=MODEL)
+    p.add_argument("--port", type=int, default=PORT)
+    p.add_argument("--stop", action="store_true", help="stop a running worker")
+    args = p.parse_args()
+
+    if args.stop:
+        client = YoloClient.connect(port=args.port)
+        if client:
+            client.shutdown()
+            # unblock accept() so the worker can exit
+            YoloClient.connect(port=args.port)
+    else:
+        serve(args.model, port=args.port)